@@ -1,24 +1,50 @@
 """
 夸克网盘资源分享网站 - Flask 后端应用
 """
-import json
+import csv
+import hmac
+import io
 import os
 import uuid
 from datetime import datetime
 from functools import wraps
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from backends import create_backend
+from bulk import FORMATS, detect_format, export_rows, import_resources, read_rows
+from catalog_stats import CatalogStats
+from clicks import ClickBuffer
+from compression import StaticCompressor, compress, compress_response, negotiate
+from facet_index import SIZE_LABELS, FacetIndex, format_facets
+from http_cache import DEFAULT_CACHE_CONTROL, conditional
+from link_checker import DEAD_LINK_PENALTY, DEAD_MARKERS, LinkChecker, LinkStatusIndex
+from link_index import LinkIndex, normalize_link
+from login_log import LoginLog
+from metrics import Metrics
+from rate_limit import SlidingWindowLimiter
+from models import Resource, encode_json
+from response_cache import ResponseCache
+from search_index import SearchIndex
+from snapshot import Generation, JsonSnapshot
+from sorted_views import (SORT_ORDERS, SortedViews, decode_cursor, encode_cursor,
+                          slice_after, sort_key, sort_resources)
+from store import ResourceStore
+from suggest_index import TOP_CACHED, SuggestIndex
 
 # 初始化 Flask 应用
 app = Flask(__name__)
 
-# 加载配置
-def load_config():
-    """加载配置文件"""
-    config_path = os.path.join(os.path.dirname(__file__), 'config.json')
-    if os.path.exists(config_path):
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+# 配置文件路径
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'config.json')
+
+# 配置和公告的代数文件：保存时加一，其他 worker 据此重新读取
+SETTINGS_GENERATION_FILE = os.path.join(os.path.dirname(__file__), 'data', 'settings.gen')
+settings_generation = Generation(SETTINGS_GENERATION_FILE)
+
+def default_config():
+    """config.json 不存在时的默认配置"""
     return {
         "site_title": "夸克资源站",
         "site_description": "精选优质资源分享",
@@ -27,73 +53,150 @@ def load_config():
         "secret_key": "default-secret-key"
     }
 
+config_snapshot = JsonSnapshot(CONFIG_FILE, settings_generation, default_config)
+
+# 加载配置
+def load_config():
+    """当前配置（只读快照，修改前先 dict(...) 复制一份）"""
+    return config_snapshot.get()
+
 def save_config(config):
     """保存配置文件"""
-    config_path = os.path.join(os.path.dirname(__file__), 'config.json')
-    with open(config_path, 'w', encoding='utf-8') as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+    config_snapshot.save(config)
 
 # 加载配置
 config = load_config()
 app.secret_key = config.get('secret_key', 'default-secret-key')
 
+# 部署在反向代理之后时，只信任最近 proxy_hops 层代理写入的 X-Forwarded-For，
+# request.remote_addr 才是真实的客户端地址（客户端自己伪造的部分不会被采用）
+if config.get('proxy_hops', 0):
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config['proxy_hops'], x_proto=config['proxy_hops'])
+
 # 数据文件路径
 DATA_FILE = os.path.join(os.path.dirname(__file__), 'data', 'resources.json')
-LOG_FILE = os.path.join(os.path.dirname(__file__), 'data', 'login_log.json')
+LOG_FILE = os.path.join(os.path.dirname(__file__), 'data', 'login_log.ndjson')
+LEGACY_LOG_FILE = os.path.join(os.path.dirname(__file__), 'data', 'login_log.json')
 ANNOUNCEMENT_FILE = os.path.join(os.path.dirname(__file__), 'data', 'announcement.json')
 
+# 运行指标（请求耗时、存储/缓存计数、列表接口分阶段耗时），metrics_enabled 为 false 时不注册任何钩子
+metrics = Metrics(enabled=config.get('metrics_enabled', True),
+                  sample_rate=config.get('metrics_sample_rate', 0.1))
+metrics.describe('http_request_duration_seconds', '请求处理耗时')
+metrics.describe('stage_duration_seconds', '接口内部各阶段耗时（抽样）')
+metrics.init_app(app)
+
+# 资源数据存储（每个 worker 进程内缓存一份，后端由 config.json 的 storage_backend 选择）
+store = ResourceStore(create_backend(config, os.path.dirname(DATA_FILE)))
+
+# 搜索倒排索引（随资源增删改增量维护）
+search_index = store.add_index(SearchIndex())
+
+# 输入联想的前缀树（标题、标签、拼音首字母）
+suggest_index = store.add_index(SuggestIndex())
+
+# 按排序方式/分类预排好的视图，分页直接切片
+sorted_views = store.add_index(SortedViews())
+
+# 分类资源数、总点击量等聚合统计
+catalog_stats = store.add_index(CatalogStats())
+
+# 标签、大小区间的分面索引（列表接口的 tag/size 筛选和分面计数）
+facet_index = store.add_index(FacetIndex())
+
+# 规范化链接索引（新增/修改/导入时拒绝重复的分享链接）
+link_index = store.add_index(LinkIndex())
+
+# 失效链接检测：失效资源集合随检测结果增量维护，后台线程按 link_check_interval 定期检查
+link_status_index = store.add_index(LinkStatusIndex())
+link_checker = LinkChecker(store, os.path.join(os.path.dirname(DATA_FILE), 'link_check.lock'),
+                           concurrency=config.get('link_check_concurrency', 8),
+                           per_host_interval=config.get('link_check_host_interval', 1.0),
+                           timeout=config.get('link_check_timeout', 10),
+                           dead_markers=config.get('link_check_dead_markers', DEAD_MARKERS))
+if config.get('link_check_interval'):
+    link_checker.start(config['link_check_interval'])
+
+# 热门列表查询的响应缓存（数据写入后自动失效）
+response_cache = ResponseCache(config.get('response_cache_size', 256))
+
+# 首页渲染结果缓存（按分类和排序方式，数据、配置或公告变化后自动失效）
+page_cache = ResponseCache(config.get('page_cache_size', 32))
+
+# 点击计数缓冲（批量合并落盘，不再每次点击重写整个数据文件）
+click_buffer = ClickBuffer(store,
+                           interval=config.get('click_flush_interval', 5),
+                           threshold=config.get('click_flush_threshold', 50))
+
+# 登录日志（追加写入，按大小轮转）
+login_log = LoginLog(LOG_FILE,
+                     max_bytes=config.get('login_log_max_bytes', 1024 * 1024),
+                     backups=config.get('login_log_backups', 5))
+login_log.import_legacy(LEGACY_LOG_FILE)
+
+# 登录限流：同一 IP 在 login_rate_window 秒内最多失败 login_rate_limit 次，多个 worker 共享计数
+login_limiter = SlidingWindowLimiter(config.get('login_rate_limit', 5),
+                                     config.get('login_rate_window', 300),
+                                     path=os.path.join(os.path.dirname(DATA_FILE), 'login_attempts.db'))
+
+def collect_metrics():
+    """导出各组件自己维护的计数"""
+    cache = response_cache.stats()
+    pages = page_cache.stats()
+    collected = [('store_operations_total', 'counter', {"kind": kind}, count)
+                 for kind, count in store.counters.items()]
+    collected += [
+        ('response_cache_hits_total', 'counter', {}, cache['hits']),
+        ('response_cache_misses_total', 'counter', {}, cache['misses']),
+        ('response_cache_evictions_total', 'counter', {}, cache['evictions']),
+        ('response_cache_entries', 'gauge', {}, cache['entries']),
+        ('page_cache_hits_total', 'counter', {}, pages['hits']),
+        ('page_cache_misses_total', 'counter', {}, pages['misses']),
+        ('resources', 'gauge', {}, catalog_stats.total_resources),
+        ('dead_links', 'gauge', {}, len(link_status_index.dead)),
+        ('clicks_pending', 'gauge', {}, click_buffer.pending_total()),
+    ]
+    return collected
+
+metrics.register_collector(collect_metrics)
+
 def load_data():
-    """加载资源数据"""
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {"categories": [], "resources": []}
+    """加载资源数据（返回进程内缓存，只读路径请勿原地修改）"""
+    return store.load()
 
 def save_data(data):
     """保存资源数据"""
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-def load_login_log():
-    """加载登录日志"""
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
-
-def save_login_log(logs):
-    """保存登录日志"""
-    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
-    # 只保留最近100条记录
-    logs = logs[-100:]
-    with open(LOG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(logs, f, ensure_ascii=False, indent=2)
+    store.save(data)
+
+def login_log_query(config):
+    """从请求参数解析登录日志的筛选条件和分页，返回 (筛选条件, 每页条数, 游标)"""
+    success = request.args.get('success', '')
+    since = request.args.get('since', '').strip().replace('T', ' ')
+    until = request.args.get('until', '').strip().replace('T', ' ')
+    if len(until) == 10:
+        until += ' 23:59:59'  # 只给日期时包含当天
+    elif len(until) == 16:
+        until += ':59'
+    filters = {
+        "ip": request.args.get('ip', '').strip() or None,
+        "success": {'1': True, '0': False}.get(success),
+        "since": since or None,
+        "until": until or None,
+    }
+    limit = clamp_limit(request.args.get('limit', 50, type=int), config)
+    return filters, limit, request.args.get('cursor') or None
 
 def log_login_attempt(ip, success, user_agent=''):
-    """记录登录尝试"""
-    logs = load_login_log()
-    logs.append({
+    """记录登录尝试（只追加一行，不读取已有记录）"""
+    login_log.append({
         "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "ip": ip,
         "success": success,
         "user_agent": user_agent[:200] if user_agent else ''  # 限制长度
     })
-    save_login_log(logs)
 
-def load_announcement():
-    """加载公告内容"""
-    if os.path.exists(ANNOUNCEMENT_FILE):
-        with open(ANNOUNCEMENT_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # 确保包含弹窗相关字段
-            if 'popup_enabled' not in data:
-                data['popup_enabled'] = False
-            if 'popup_title' not in data:
-                data['popup_title'] = data.get('title', '公告')
-            if 'popup_content' not in data:
-                data['popup_content'] = data.get('content', '')
-            return data
+def default_announcement():
+    """公告文件不存在时的默认公告"""
     return {
         "enabled": True,
         "popup_enabled": False,
@@ -104,12 +207,103 @@ def load_announcement():
         "updated_at": datetime.now().isoformat()
     }
 
+def fill_popup_defaults(data):
+    """确保包含弹窗相关字段"""
+    if 'popup_enabled' not in data:
+        data['popup_enabled'] = False
+    if 'popup_title' not in data:
+        data['popup_title'] = data.get('title', '公告')
+    if 'popup_content' not in data:
+        data['popup_content'] = data.get('content', '')
+    return data
+
+announcement_snapshot = JsonSnapshot(ANNOUNCEMENT_FILE, settings_generation,
+                                     default_announcement, fill_popup_defaults)
+
+def load_announcement():
+    """当前公告（只读快照，修改前先 dict(...) 复制一份）"""
+    return announcement_snapshot.get()
+
 def save_announcement(announcement):
     """保存公告内容"""
-    os.makedirs(os.path.dirname(ANNOUNCEMENT_FILE), exist_ok=True)
     announcement['updated_at'] = datetime.now().isoformat()
-    with open(ANNOUNCEMENT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(announcement, f, ensure_ascii=False, indent=2)
+    announcement_snapshot.save(announcement)
+
+def with_category_info(resource, category_map):
+    """返回附带分类信息的资源副本"""
+    cat_id = resource.get('category', '')
+    if cat_id in category_map:
+        return dict(resource, category_info=category_map[cat_id])
+    return resource
+
+def clamp_limit(limit, config):
+    """限制每页数量在 1 ~ max_page_size 之间，防止一次请求拉取全部资源"""
+    return max(1, min(limit, config.get('max_page_size', 100)))
+
+def cache_control_for(name):
+    """公开接口的 Cache-Control，可在 config.json 的 cache_control 中按接口覆盖"""
+    return load_config().get('cache_control', {}).get(name, DEFAULT_CACHE_CONTROL)
+
+def resources_version():
+    """资源列表的版本：数据 + 配置（默认每页数量等来自配置）"""
+    data_stamp, data_mtime = store.version()
+    config_stamp, config_mtime = config_snapshot.version()
+    return (data_stamp, config_stamp), max(data_mtime or 0, config_mtime or 0) or None
+
+def announcement_version():
+    """公告的版本"""
+    return announcement_snapshot.version()
+
+def index_version():
+    """首页的版本：资源数据 + 配置 + 公告"""
+    (resources_stamp, resources_mtime), (announcement_stamp, announcement_mtime) = \
+        resources_version(), announcement_version()
+    return (resources_stamp, announcement_stamp), max(resources_mtime or 0, announcement_mtime or 0) or None
+
+def json_response(entry, mimetype=None):
+    """用响应缓存条目 {编码: 字节串} 构造响应
+
+    未压缩的原文存在 None 键下；需要压缩时按协商到的编码压缩一次并存回条目，
+    之后同一缓存条目的请求直接发送压缩好的字节。
+    """
+    mimetype = mimetype or app.json.mimetype
+    body = entry[None]
+    encoding = None
+    if config.get('compression_enabled', True) and len(body) >= config.get('compress_min_size', 1024):
+        encoding = negotiate()
+    if encoding is None:
+        return app.response_class(body, mimetype=mimetype)
+    if encoding not in entry:
+        entry[encoding] = compress(body, encoding)
+    response = app.response_class(entry[encoding], mimetype=mimetype)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+def cached_body(cache_key, version, body):
+    """把序列化好的响应写入响应缓存"""
+    entry = {None: body}
+    response_cache.put(cache_key, version, entry)
+    return json_response(entry)
+
+def resources_body(resources, category_map, pagination, facets=None):
+    """列表响应的 JSON 字节串
+
+    每个资源直接使用自身缓存的 JSON 片段，附带的分类信息每个分类只序列化一次后拼进片段末尾，
+    整个响应只有分页信息（和分面计数）需要现场序列化。
+    """
+    category_json = {}
+    parts = []
+    for resource in resources:
+        fragment = Resource.of(resource).fragment()
+        cat_id = resource.get('category', '')
+        if cat_id in category_map:
+            if cat_id not in category_json:
+                category_json[cat_id] = encode_json(category_map[cat_id])
+            fragment = fragment[:-1] + b',"category_info":' + category_json[cat_id] + b'}'
+        parts.append(fragment)
+    extra = b',"facets":' + encode_json(facets) if facets is not None else b''
+    return b''.join((b'{"pagination":', encode_json(pagination), extra,
+                     b',"resources":[', b','.join(parts), b']}\n'))
 
 def login_required(f):
     """管理员登录验证装饰器"""
@@ -122,95 +316,311 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# ==================== 响应压缩 ====================
+
+if config.get('compression_enabled', True):
+    # 静态资源启动时预压缩一次，请求时按 Accept-Encoding 直接取结果
+    static_compressor = StaticCompressor(app.static_folder)
+
+    def send_static(filename):
+        """静态文件（优先返回预压缩版本）"""
+        return static_compressor.apply(filename, app.send_static_file(filename))
+
+    app.view_functions['static'] = send_static
+
+    @app.after_request
+    def compress_json_response(response):
+        """按 Accept-Encoding 压缩 JSON 接口和 HTML 页面响应"""
+        return compress_response(response, config.get('compress_min_size', 1024))
+
 # ==================== 前台路由 ====================
 
 @app.route('/')
+@conditional('index', index_version, cache_control_for)
 def index():
-    """前台首页"""
+    """前台首页
+
+    公告、分类计数和第一页资源直接嵌入页面，前端不必再依次请求三个接口才能显示内容；
+    渲染好的页面按 (分类, 排序) 缓存。
+    """
     config = load_config()
     data = load_data()
-    return render_template('index.html', 
-                         config=config, 
-                         categories=data.get('categories', []))
+    categories = data.get('categories', [])
+    category = request.args.get('category', '')
+    if category not in {c['id'] for c in categories}:
+        category = ''
+    sort = request.args.get('sort', 'newest')
+    if sort not in SORT_ORDERS:
+        sort = 'newest'
+    
+    cache_key = (category, sort)
+    version = index_version()[0]
+    entry = page_cache.get(cache_key, version)
+    if entry is None:
+        html = render_template('index.html',
+                               config=config,
+                               categories=categories,
+                               initial_state=initial_state(config, categories, category, sort))
+        entry = {None: html.encode('utf-8')}
+        page_cache.put(cache_key, version, entry)
+    return json_response(entry, 'text/html')
+
+def initial_state(config, categories, category, sort):
+    """首页嵌入的初始数据，与 /api/announcement、/api/categories 和
+    /api/resources?cursor=&facets=1 的响应相同，供前端直接渲染"""
+    announcement = load_announcement()
+    if not announcement.get('enabled', True):
+        announcement = {"enabled": False}
+    category_counts = [dict(c, count=catalog_stats.count(c['id'])) for c in categories]
+    
+    limit = clamp_limit(config.get('items_per_page', 12), config)
+    hide_dead = bool(config.get('link_check_hide_dead')) and bool(link_status_index.dead)
+    page_keys, total = view_page_after(sort, category, None, limit + 1, hide_dead)
+    has_next = len(page_keys) > limit
+    page_keys = page_keys[:limit]
+    listing = resources_body(store.get_resources([key[1] for key in page_keys]),
+                             {c['id']: c for c in categories}, {
+        "limit": limit,
+        "total": total,
+        "has_next": has_next,
+        "next_cursor": encode_cursor(sort, page_keys[-1]) if has_next else None
+    }, facet_counts('', category, hide_dead, (), (), None))
+    
+    body = b''.join((b'{"category":', encode_json(category), b',"sort":', encode_json(sort),
+                     b',"announcement":', encode_json(announcement),
+                     b',"categories":', encode_json(category_counts),
+                     b',"listing":', listing.rstrip(b'\n'), b'}'))
+    # 嵌在 <script> 中，转义 "<" 防止内容里的 "</script>" 提前结束标签
+    return body.replace(b'<', b'\\u003c').decode('utf-8')
 
 @app.route('/api/resources')
+@conditional('resources', resources_version, cache_control_for)
 def api_get_resources():
-    """获取资源列表 API"""
+    """获取资源列表 API
+
+    默认按 page/limit 偏移分页；传入 cursor 参数（第一页传空字符串）时使用游标分页，
+    返回 next_cursor 供下一页使用，翻页期间新增资源或热度变化不会导致重复/遗漏。
+    tag（可重复，需同时满足）和 size（大小区间，可重复，满足其一）为分面筛选，
+    facets=1 时在响应中附带当前条件下各标签、各大小区间的资源数。
+    """
+    stages = metrics.stages('api_get_resources')
     data = load_data()
     config = load_config()
     resources = data.get('resources', [])
     categories = data.get('categories', [])
+    stages.mark('load')
     
     # 获取查询参数
     page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', config.get('items_per_page', 12), type=int)
+    limit = clamp_limit(request.args.get('limit', config.get('items_per_page', 12), type=int), config)
     category = request.args.get('category', '')
     search = request.args.get('search', '')
-    sort = request.args.get('sort', 'newest')
+    sort = request.args.get('sort', 'relevance' if search else 'newest')
+    cursor = request.args.get('cursor')
+    tags = tuple(dict.fromkeys(t.strip() for t in request.args.getlist('tag') if t.strip()))
+    sizes = tuple(dict.fromkeys(v for v in request.args.getlist('size') if v in SIZE_LABELS))
+    with_facets = request.args.get('facets', '') in ('1', 'true')
+    # 是否隐藏已失效的链接（默认由 link_check_hide_dead 配置决定）
+    hide_dead = request.args.get('hide_dead', '1' if config.get('link_check_hide_dead') else '') in ('1', 'true')
+    hide_dead = hide_dead and bool(link_status_index.dead)
+    
+    # 命中响应缓存时直接返回序列化好的结果
+    cache_key = (category, search, sort, page, limit, cursor, hide_dead, tags, sizes, with_facets)
+    cache_version = resources_version()[0]
+    entry = response_cache.get(cache_key, cache_version)
+    stages.mark('cache_lookup')
+    if entry is not None:
+        return json_response(entry)
     
-    # 筛选分类
-    if category:
-        resources = [r for r in resources if r.get('category') == category]
+    # 获取分类信息映射
+    category_map = {c['id']: c for c in categories}
     
-    # 搜索
-    if search:
-        search_lower = search.lower()
-        resources = [r for r in resources if 
-                    search_lower in r.get('title', '').lower() or 
-                    search_lower in r.get('description', '').lower()]
-    
-    # 排序
-    if sort == 'newest':
-        resources.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-    elif sort == 'oldest':
-        resources.sort(key=lambda x: x.get('created_at', ''))
-    elif sort == 'popular':
-        resources.sort(key=lambda x: x.get('clicks', 0), reverse=True)
-    elif sort == 'name':
-        resources.sort(key=lambda x: x.get('title', ''))
+    # 有搜索词或分面条件时先取候选集（倒排索引/分面集合求交），否则直接使用预排序视图
+    facet_ids = facet_index.filter(category, tags, sizes)
+    candidates = scores = None
+    if search or facet_ids is not None:
+        candidates, scores = filter_candidates(search, category, hide_dead, facet_ids)
+    facets = facet_counts(search, category, hide_dead, tags, sizes, candidates) if with_facets else None
+    
+    if cursor is not None:
+        if sort not in SORT_ORDERS and not (sort == 'relevance' and search):
+            sort = 'newest'
+        try:
+            after = decode_cursor(cursor, sort)
+            if candidates is not None:
+                page_keys, total = candidates_page_after(candidates, scores, sort, after, limit + 1)
+            else:
+                page_keys, total = view_page_after(sort, category, after, limit + 1, hide_dead)
+        except (ValueError, TypeError):
+            return jsonify({"error": "无效的游标"}), 400
+        
+        has_next = len(page_keys) > limit
+        page_keys = page_keys[:limit]
+        resources = store.get_resources([key[1] for key in page_keys])
+        stages.mark('query')
+        body = resources_body(resources, category_map, {
+            "limit": limit,
+            "total": total,
+            "has_next": has_next,
+            "next_cursor": encode_cursor(sort, page_keys[-1]) if has_next else None
+        }, facets)
+        stages.mark('serialize')
+        return cached_body(cache_key, cache_version, body)
     
     # 计算分页
-    total = len(resources)
-    total_pages = (total + limit - 1) // limit if limit > 0 else 1
     start = (page - 1) * limit
     end = start + limit
     
-    # 获取分类信息映射
-    category_map = {c['id']: c for c in categories}
-    
-    # 为每个资源添加分类信息
-    paginated_resources = resources[start:end]
-    for resource in paginated_resources:
-        cat_id = resource.get('category', '')
-        if cat_id in category_map:
-            resource['category_info'] = category_map[cat_id]
-    
-    return jsonify({
-        "resources": paginated_resources,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "total_pages": total_pages,
-            "has_prev": page > 1,
-            "has_next": page < total_pages
-        }
-    })
+    if candidates is None and sort in SORT_ORDERS and hide_dead:
+        # 隐藏失效链接：视图已经排好序，过滤后切片
+        ids = [rid for rid in sorted_views.page(sort, category) if not link_status_index.is_dead(rid)]
+        total = len(ids)
+        resources = store.get_resources(ids[start:end])
+    elif candidates is None and sort in SORT_ORDERS:
+        # 没有搜索和分面条件时，直接从预排序视图中切出当前页
+        total = sorted_views.count(category)
+        resources = store.get_resources(sorted_views.page(sort, category, start, end))
+    else:
+        if candidates is not None:
+            resources = candidates
+        else:
+            # 未知的排序方式：按原始顺序筛选
+            if category:
+                resources = [r for r in resources if r.get('category') == category]
+            if hide_dead:
+                resources = [r for r in resources if not link_status_index.is_dead(r.get('id'))]
+        
+        # 排序（只对候选集排序）
+        if sort == 'relevance' and search:
+            resources = sorted(resources, key=lambda x: (scores.get(x.get('id'), 0), x.get('id')), reverse=True)
+        elif sort in SORT_ORDERS:
+            resources = sort_resources(resources, sort)
+        
+        total = len(resources)
+        resources = resources[start:end]
+    
+    total_pages = (total + limit - 1) // limit
+    stages.mark('query')
+    
+    # 资源片段已缓存，分类信息在拼接时附加，不复制也不修改缓存中的数据
+    body = resources_body(resources, category_map, {
+        "page": page,
+        "limit": limit,
+        "total": total,
+        "total_pages": total_pages,
+        "has_prev": page > 1,
+        "has_next": page < total_pages
+    }, facets)
+    stages.mark('serialize')
+    return cached_body(cache_key, cache_version, body)
+
+def ranked_scores(search):
+    """搜索相关度，失效链接降权排到最后"""
+    scores = search_index.search(search)
+    dead = link_status_index.dead
+    if dead:
+        scores = {rid: score - DEAD_LINK_PENALTY if rid in dead else score for rid, score in scores.items()}
+    return scores
+
+def dead_count(category=''):
+    """分类下失效链接的数量"""
+    if not category:
+        return len(link_status_index.dead)
+    return sum(1 for r in store.get_resources(link_status_index.dead) if r.get('category') == category)
+
+def alive_page_after(sort, category, after, limit):
+    """跳过失效链接的游标分页（失效的通常很少，不够时接着往后取）"""
+    keys = []
+    while len(keys) < limit:
+        chunk = sorted_views.page_after(sort, category, after, limit)
+        keys.extend(key for key in chunk if not link_status_index.is_dead(key[1]))
+        if len(chunk) < limit:
+            break
+        after = chunk[-1]
+    return keys[:limit]
+
+def view_page_after(sort, category, after, limit, hide_dead=False):
+    """预排序视图的游标分页（可跳过失效链接），返回 (排序键列表, 总数)"""
+    if hide_dead:
+        return alive_page_after(sort, category, after, limit), sorted_views.count(category) - dead_count(category)
+    return sorted_views.page_after(sort, category, after, limit), sorted_views.count(category)
+
+def filter_candidates(search, category, hide_dead=False, facet_ids=None):
+    """按搜索词、分面集合、分类和失效状态筛选出的候选资源，返回 (资源列表, 相关度得分)"""
+    scores = {}
+    if search:
+        scores = ranked_scores(search)
+        ids = scores if facet_ids is None else [rid for rid in scores if rid in facet_ids]
+    else:
+        ids = facet_ids
+    resources = store.get_resources(ids)
+    # 分面集合求交时已经限定了分类
+    if category and facet_ids is None:
+        resources = [r for r in resources if r.get('category') == category]
+    if hide_dead:
+        resources = [r for r in resources if not link_status_index.is_dead(r.get('id'))]
+    return resources, scores
+
+def candidates_page_after(resources, scores, sort, after, limit):
+    """候选资源的游标分页，返回 (排序键列表, 命中总数)"""
+    if sort == 'relevance':
+        keys = sorted((scores[r['id']], r['id']) for r in resources)
+        reverse = True
+    else:
+        field, reverse = SORT_ORDERS[sort]
+        keys = sorted(sort_key(r, field) for r in resources)
+    return slice_after(keys, after, limit, reverse), len(keys)
+
+def search_page_after(search, category, sort, after, limit, hide_dead=False):
+    """搜索结果的游标分页，返回 (排序键列表, 命中总数)"""
+    resources, scores = filter_candidates(search, category, hide_dead)
+    return candidates_page_after(resources, scores, sort, after, limit)
+
+def facet_counts(search, category, hide_dead, tags, sizes, candidates):
+    """当前条件下的分面计数
+
+    没有搜索和分面条件时直接读取增量维护的计数（隐藏失效链接时减去失效资源），否则只统计候选集。
+    大小区间按“或”筛选，其计数不受已选区间影响，这样切换区间前就能看到每个区间有多少资源。
+    """
+    if candidates is None:
+        exclude = link_status_index.dead if hide_dead else ()
+        tag_counts, size_counts = facet_index.counts(category=category, exclude=exclude)
+        return format_facets(tag_counts, size_counts, tags)
+    tag_counts, size_counts = facet_index.counts({r['id'] for r in candidates})
+    if sizes:
+        others = facet_index.filter(category, tags)
+        if others is None and not search:
+            _, size_counts = facet_index.counts(category=category,
+                                                exclude=link_status_index.dead if hide_dead else ())
+        else:
+            unsized, _ = filter_candidates(search, category, hide_dead, others)
+            _, size_counts = facet_index.counts({r['id'] for r in unsized})
+    return format_facets(tag_counts, size_counts, tags)
 
 @app.route('/api/categories')
+@conditional('categories', store.version, cache_control_for)
 def api_get_categories():
     """获取分类列表 API"""
     data = load_data()
     categories = data.get('categories', [])
     
-    # 计算每个分类的资源数量
-    resources = data.get('resources', [])
-    for category in categories:
-        category['count'] = len([r for r in resources if r.get('category') == category['id']])
+    # 每个分类的资源数量（增量维护的计数）
+    categories = [dict(category, count=catalog_stats.count(category['id'])) for category in categories]
     
     return jsonify({"categories": categories})
 
+@app.route('/api/suggest')
+def api_suggest():
+    """输入联想 API：按前缀返回热门的标题和标签"""
+    prefix = request.args.get('q', '')[:100]
+    limit = max(1, min(request.args.get('limit', 8, type=int), TOP_CACHED))
+    store.load()  # 只检查后端指纹，其他 worker 写入后才会刷新
+    suggestions = [{"text": text, "type": kind, "id": rid}
+                   for kind, text, rid in suggest_index.suggest(prefix, limit, link_status_index.dead)]
+    return jsonify({"suggestions": suggestions})
+
 @app.route('/api/announcement')
+@conditional('announcement', announcement_version, cache_control_for)
 def api_get_announcement():
     """获取公告内容 API"""
     announcement = load_announcement()
@@ -221,16 +631,12 @@ def api_get_announcement():
 @app.route('/api/resources/<resource_id>/click', methods=['POST'])
 def api_record_click(resource_id):
     """记录资源点击 API"""
-    data = load_data()
-    resources = data.get('resources', [])
-    
-    for resource in resources:
-        if resource.get('id') == resource_id:
-            resource['clicks'] = resource.get('clicks', 0) + 1
-            save_data(data)
-            return jsonify({"success": True, "clicks": resource['clicks']})
+    resource = store.get_resource(resource_id)
+    if not resource:
+        return jsonify({"error": "资源不存在"}), 404
     
-    return jsonify({"error": "资源不存在"}), 404
+    pending = click_buffer.record(resource_id)
+    return jsonify({"success": True, "clicks": resource.get('clicks', 0) + pending})
 
 # ==================== 管理后台路由 ====================
 
@@ -242,19 +648,39 @@ def admin_dashboard():
     data = load_data()
     
     # 统计数据
-    resources = data.get('resources', [])
     categories = data.get('categories', [])
-    total_clicks = sum(r.get('clicks', 0) for r in resources)
     
-    # 热门资源
-    popular_resources = sorted(resources, key=lambda x: x.get('clicks', 0), reverse=True)[:5]
+    # 热门资源（直接取预排序视图的前 5 条）
+    popular_resources = store.get_resources(sorted_views.page('popular', end=5))
     
     return render_template('admin/dashboard.html',
                          config=config,
-                         total_resources=len(resources),
+                         total_resources=catalog_stats.total_resources,
                          total_categories=len(categories),
-                         total_clicks=total_clicks,
-                         popular_resources=popular_resources)
+                         total_clicks=catalog_stats.total_clicks,
+                         popular_resources=popular_resources,
+                         cache_stats=response_cache.stats())
+
+@app.route('/admin/metrics')
+@login_required
+def admin_metrics():
+    """运行指标页面"""
+    config = load_config()
+    return render_template('admin/metrics.html',
+                         config=config,
+                         enabled=metrics.enabled,
+                         sample_rate=metrics.sample_rate,
+                         summary=metrics.summary())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus 采集接口：需要登录后台，或携带 Authorization: Bearer <metrics_token>"""
+    token = load_config().get('metrics_token')
+    authorized = session.get('admin_logged_in') or (
+        token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'))
+    if not authorized:
+        return jsonify({"error": "未授权访问"}), 401
+    return app.response_class(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
@@ -263,14 +689,26 @@ def admin_login():
     
     if request.method == 'POST':
         password = request.form.get('password', '')
-        ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+        # 限流按连接地址计数，不能直接读取客户端可以随意填写的 X-Forwarded-For
+        ip = request.remote_addr
         user_agent = request.headers.get('User-Agent', '')
         
-        if password == config.get('admin_password'):
+        # 失败次数超限时直接拒绝，不比对密码也不写日志
+        allowed, retry_after = login_limiter.check(ip)
+        if not allowed:
+            minutes = (retry_after + 59) // 60
+            response = app.make_response((render_template(
+                'admin/login.html', config=config, error=f"尝试次数过多，请 {minutes} 分钟后再试"), 429))
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        
+        if hmac.compare_digest(password.encode('utf-8'), str(config.get('admin_password', '')).encode('utf-8')):
             session['admin_logged_in'] = True
+            login_limiter.reset(ip)
             log_login_attempt(ip, True, user_agent)
             return redirect(url_for('admin_dashboard'))
         
+        login_limiter.hit(ip)
         log_login_attempt(ip, False, user_agent)
         return render_template('admin/login.html', config=config, error="密码错误")
     
@@ -281,10 +719,10 @@ def admin_login():
 def admin_logs():
     """登录日志页面"""
     config = load_config()
-    logs = load_login_log()
-    # 倒序显示，最新的在前面
-    logs = list(reversed(logs))
-    return render_template('admin/logs.html', config=config, logs=logs)
+    filters, limit, cursor = login_log_query(config)
+    logs, next_cursor = login_log.page(limit, cursor, **filters)
+    return render_template('admin/logs.html', config=config, logs=logs, next_cursor=next_cursor,
+                           filters=request.args, paged=cursor is not None)
 
 @app.route('/admin/logout')
 def admin_logout():
@@ -329,42 +767,122 @@ def admin_announcement():
 
 # ==================== 管理 API ====================
 
+@app.route('/api/admin/stats', methods=['GET'])
+@login_required
+def api_admin_stats():
+    """站点统计 API：资源总数、总点击量、各分类资源数、热门资源"""
+    data = load_data()
+    top = min(max(request.args.get('top', 10, type=int), 1), 100)
+    return jsonify({
+        "total_resources": catalog_stats.total_resources,
+        "total_categories": len(data.get('categories', [])),
+        "total_clicks": catalog_stats.total_clicks,
+        "categories": [{"id": c['id'], "name": c.get('name'), "count": catalog_stats.count(c['id'])}
+                       for c in data.get('categories', [])],
+        "popular": [{"id": r.get('id'), "title": r.get('title'), "clicks": r.get('clicks', 0)}
+                    for r in store.get_resources(sorted_views.page('popular', end=top))],
+        "duplicate_links": len(link_index.duplicates()),
+        "dead_links": len(link_status_index.dead),
+        "response_cache": response_cache.stats()
+    })
+
+@app.route('/api/admin/duplicates', methods=['GET'])
+@login_required
+def api_admin_duplicates():
+    """重复链接报告：指向同一分享的多个资源"""
+    clusters = []
+    for key, ids in link_index.duplicates():
+        clusters.append({
+            "link": key,
+            "resources": [{"id": r.get('id'), "title": r.get('title'), "link": r.get('link'),
+                           "created_at": r.get('created_at')} for r in store.get_resources(ids)]
+        })
+    return jsonify({"total": len(clusters), "clusters": clusters})
+
+@app.route('/api/admin/logs', methods=['GET'])
+@login_required
+def api_admin_logs():
+    """登录日志（最新在前），支持 ip、success、since、until 筛选，用 cursor 翻页"""
+    filters, limit, cursor = login_log_query(load_config())
+    logs, next_cursor = login_log.page(limit, cursor, **filters)
+    return jsonify({"logs": logs, "next_cursor": next_cursor})
+
+@app.route('/api/admin/link-check', methods=['GET'])
+@login_required
+def api_admin_link_check_status():
+    """失效链接检测状态：本进程最近一次检查的进度和当前失效的资源"""
+    dead = store.get_resources(sorted(link_status_index.dead))
+    return jsonify({
+        "last_run": link_checker.last_run,
+        "dead_total": len(dead),
+        "dead": [{"id": r.get('id'), "title": r.get('title'), "link": r.get('link'),
+                  "detail": r.get('link_detail'), "checked_at": r.get('link_checked_at')} for r in dead]
+    })
+
+@app.route('/api/admin/link-check', methods=['POST'])
+@login_required
+def api_admin_link_check():
+    """立即在后台检查链接（force 忽略有效期，ids 只检查指定资源）"""
+    req_data = request.get_json(silent=True) or {}
+    link_checker.run_in_background(force=bool(req_data.get('force')), resource_ids=req_data.get('ids'))
+    return jsonify({"success": True, "message": "已开始检查"})
+
 @app.route('/api/admin/resources', methods=['GET'])
 @login_required
 def api_admin_get_resources():
-    """获取资源列表（管理用）"""
+    """获取资源列表（管理用），同样支持 cursor 游标分页"""
     data = load_data()
-    resources = data.get('resources', [])
+    config = load_config()
     categories = data.get('categories', [])
     
     # 获取查询参数
     page = request.args.get('page', 1, type=int)
-    limit = request.args.get('limit', 20, type=int)
+    limit = clamp_limit(request.args.get('limit', 20, type=int), config)
     search = request.args.get('search', '')
+    cursor = request.args.get('cursor')
     
-    # 搜索
-    if search:
-        search_lower = search.lower()
-        resources = [r for r in resources if 
-                    search_lower in r.get('title', '').lower() or 
-                    search_lower in r.get('description', '').lower()]
+    # 获取分类信息
+    category_map = {c['id']: c for c in categories}
     
-    # 按创建时间倒序
-    resources.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor, 'newest')
+            if search:
+                page_keys, total = search_page_after(search, '', 'newest', after, limit + 1)
+            else:
+                page_keys = sorted_views.page_after('newest', after=after, limit=limit + 1)
+                total = sorted_views.count()
+        except (ValueError, TypeError):
+            return jsonify({"error": "无效的游标"}), 400
+        
+        has_next = len(page_keys) > limit
+        page_keys = page_keys[:limit]
+        resources = store.get_resources([key[1] for key in page_keys])
+        return jsonify({
+            "resources": [with_category_info(r, category_map) for r in resources],
+            "pagination": {
+                "limit": limit,
+                "total": total,
+                "has_next": has_next,
+                "next_cursor": encode_cursor('newest', page_keys[-1]) if has_next else None
+            }
+        })
     
     # 分页
-    total = len(resources)
-    total_pages = (total + limit - 1) // limit if limit > 0 else 1
     start = (page - 1) * limit
     end = start + limit
     
-    # 获取分类信息
-    category_map = {c['id']: c for c in categories}
-    paginated_resources = resources[start:end]
-    for resource in paginated_resources:
-        cat_id = resource.get('category', '')
-        if cat_id in category_map:
-            resource['category_info'] = category_map[cat_id]
+    # 按创建时间倒序：无搜索时直接切预排序视图，有搜索时只排序候选集
+    if search:
+        resources = sort_resources(store.get_resources(search_index.search(search)), 'newest')
+        total = len(resources)
+        resources = resources[start:end]
+    else:
+        total = sorted_views.count()
+        resources = store.get_resources(sorted_views.page('newest', start=start, end=end))
+    total_pages = (total + limit - 1) // limit
+    
+    paginated_resources = [with_category_info(r, category_map) for r in resources]
     
     return jsonify({
         "resources": paginated_resources,
@@ -380,8 +898,6 @@ def api_admin_get_resources():
 @login_required
 def api_admin_add_resource():
     """添加资源"""
-    data = load_data()
-    
     # 获取请求数据
     req_data = request.get_json()
     if not req_data:
@@ -411,25 +927,64 @@ def api_admin_add_resource():
         "updated_at": now
     }
     
-    data['resources'].append(new_resource)
-    save_data(data)
+    # 同一个分享链接只收录一次：在写锁内查重（锁内已刷新到其他 worker 的最新数据），查重和写入之间不会插入别的写入
+    with store.locked():
+        existing = link_index.find(link)
+        if existing:
+            return jsonify({"error": "该链接已存在", "duplicates": existing}), 409
+        store.add_resource(new_resource)
     
     return jsonify({"success": True, "resource": new_resource})
 
+@app.route('/api/admin/resources/import', methods=['POST'])
+@login_required
+def api_admin_import_resources():
+    """批量导入资源
+
+    请求体为 NDJSON（每行一个资源）或 CSV（首行为列名），也可以用 multipart 上传 file 字段。
+    格式由 format 参数指定，省略时按文件名/Content-Type 判断；dry_run=1 时只校验不写入。
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        raw, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        raw, filename, content_type = request.stream, '', request.mimetype
+    fmt = request.args.get('format') or detect_format(filename, content_type)
+    if fmt not in FORMATS:
+        return jsonify({"error": f"不支持的格式: {fmt}"}), 400
+    
+    stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+    try:
+        report = import_resources(store, link_index, read_rows(stream, fmt),
+                                  dry_run=request.args.get('dry_run') in ('1', 'true'))
+    except UnicodeDecodeError:
+        return jsonify({"error": "文件编码必须是 UTF-8"}), 400
+    except csv.Error as e:
+        return jsonify({"error": f"CSV 格式错误: {e}"}), 400
+    
+    return jsonify(dict(report, success=True))
+
+@app.route('/api/admin/resources/export', methods=['GET'])
+@login_required
+def api_admin_export_resources():
+    """流式导出全部资源（format=ndjson 或 csv）"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({"error": f"不支持的格式: {fmt}"}), 400
+    
+    # 导出的是当前数据的快照，导出过程中的修改不影响本次结果
+    resources = load_data().get('resources', [])
+    filename = f"resources-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(export_rows(resources, fmt), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
 @app.route('/api/admin/resources/<resource_id>', methods=['PUT'])
 @login_required
 def api_admin_update_resource(resource_id):
     """更新资源"""
-    data = load_data()
-    
     # 查找资源
-    resource = None
-    for r in data['resources']:
-        if r.get('id') == resource_id:
-            resource = r
-            break
-    
-    if not resource:
+    if not store.get_resource(resource_id):
         return jsonify({"error": "资源不存在"}), 404
     
     # 获取请求数据
@@ -438,22 +993,34 @@ def api_admin_update_resource(resource_id):
         return jsonify({"error": "无效的请求数据"}), 400
     
     # 更新字段
+    changes = {}
     if 'title' in req_data:
-        resource['title'] = req_data['title'].strip()
+        changes['title'] = req_data['title'].strip()
     if 'description' in req_data:
-        resource['description'] = req_data['description'].strip()
+        changes['description'] = req_data['description'].strip()
     if 'category' in req_data:
-        resource['category'] = req_data['category']
+        changes['category'] = req_data['category']
     if 'link' in req_data:
-        resource['link'] = req_data['link'].strip()
+        changes['link'] = req_data['link'].strip()
     if 'size' in req_data:
-        resource['size'] = req_data['size'].strip()
+        changes['size'] = req_data['size'].strip()
     if 'tags' in req_data:
-        resource['tags'] = req_data['tags']
-    
-    resource['updated_at'] = datetime.now().isoformat()
-    
-    save_data(data)
+        changes['tags'] = req_data['tags']
+    
+    changes['updated_at'] = datetime.now().isoformat()
+    
+    # 查重与写入在同一把写锁内，见 api_admin_add_resource；编辑表单总会带上 link，
+    # 只有链接真正改变时才查重，否则已与其他资源重复的旧数据就无法再修改其他字段
+    with store.locked():
+        current = store.get_resource(resource_id)
+        if 'link' in changes and current is not None and \
+                normalize_link(changes['link']) != normalize_link(current.get('link')):
+            existing = link_index.find(changes['link'], exclude=resource_id)
+            if existing:
+                return jsonify({"error": "该链接已被其他资源使用", "duplicates": existing}), 409
+        resource = store.update_resource(resource_id, changes)
+    if not resource:
+        return jsonify({"error": "资源不存在"}), 404
     
     return jsonify({"success": True, "resource": resource})
 
@@ -461,35 +1028,21 @@ def api_admin_update_resource(resource_id):
 @login_required
 def api_admin_delete_resource(resource_id):
     """删除资源"""
-    data = load_data()
-    
     # 查找并删除资源
-    original_len = len(data['resources'])
-    data['resources'] = [r for r in data['resources'] if r.get('id') != resource_id]
-    
-    if len(data['resources']) == original_len:
+    if not store.delete_resources([resource_id]):
         return jsonify({"error": "资源不存在"}), 404
     
-    save_data(data)
-    
     return jsonify({"success": True})
 
 @app.route('/api/admin/resources/batch-delete', methods=['POST'])
 @login_required
 def api_admin_batch_delete_resources():
     """批量删除资源"""
-    data = load_data()
-    
     req_data = request.get_json()
     if not req_data or 'ids' not in req_data:
         return jsonify({"error": "无效的请求数据"}), 400
     
-    ids_to_delete = set(req_data['ids'])
-    original_len = len(data['resources'])
-    data['resources'] = [r for r in data['resources'] if r.get('id') not in ids_to_delete]
-    deleted_count = original_len - len(data['resources'])
-    
-    save_data(data)
+    deleted_count = store.delete_resources(req_data['ids'])
     
     return jsonify({"success": True, "deleted_count": deleted_count})
 
@@ -525,11 +1078,7 @@ def api_admin_add_category():
         "icon": req_data.get('icon', '📁')
     }
     
-    if 'categories' not in data:
-        data['categories'] = []
-    data['categories'].append(new_category)
-    
-    save_data(data)
+    store.save_categories(data.get('categories', []) + [new_category])
     
     return jsonify({"success": True, "category": new_category})
 
@@ -543,7 +1092,7 @@ def api_admin_update_category(category_id):
     category = None
     for c in data.get('categories', []):
         if c.get('id') == category_id:
-            category = c
+            category = dict(c)
             break
     
     if not category:
@@ -558,7 +1107,8 @@ def api_admin_update_category(category_id):
     if 'icon' in req_data:
         category['icon'] = req_data['icon']
     
-    save_data(data)
+    store.save_categories([category if c.get('id') == category_id else c
+                           for c in data.get('categories', [])])
     
     return jsonify({"success": True, "category": category})
 
@@ -569,20 +1119,19 @@ def api_admin_delete_category(category_id):
     data = load_data()
     
     # 检查是否有资源使用该分类
-    resources_using = [r for r in data.get('resources', []) if r.get('category') == category_id]
+    resources_using = catalog_stats.count(category_id)
     if resources_using:
         return jsonify({
-            "error": f"该分类下有 {len(resources_using)} 个资源，请先删除或移动这些资源"
+            "error": f"该分类下有 {resources_using} 个资源，请先删除或移动这些资源"
         }), 400
     
     # 删除分类
-    original_len = len(data.get('categories', []))
-    data['categories'] = [c for c in data.get('categories', []) if c.get('id') != category_id]
+    categories = [c for c in data.get('categories', []) if c.get('id') != category_id]
     
-    if len(data['categories']) == original_len:
+    if len(categories) == len(data.get('categories', [])):
         return jsonify({"error": "分类不存在"}), 404
     
-    save_data(data)
+    store.save_categories(categories)
     
     return jsonify({"success": True})
 
@@ -592,7 +1141,7 @@ def api_admin_delete_category(category_id):
 @login_required
 def api_admin_change_password():
     """修改密码"""
-    config = load_config()
+    config = dict(load_config())
     
     req_data = request.get_json()
     if not req_data:
@@ -616,7 +1165,7 @@ def api_admin_change_password():
 @login_required
 def api_admin_update_settings():
     """更新网站设置"""
-    config = load_config()
+    config = dict(load_config())
     
     req_data = request.get_json()
     if not req_data:
@@ -654,7 +1203,7 @@ def api_admin_update_announcement():
     if not req_data:
         return jsonify({"error": "无效的请求数据"}), 400
     
-    announcement = load_announcement()
+    announcement = dict(load_announcement())
     
     # 横幅公告设置
     if 'enabled' in req_data:
@@ -699,7 +1248,7 @@ if __name__ == '__main__':
     os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
     
     # 如果数据文件不存在，创建初始数据
-    if not os.path.exists(DATA_FILE):
+    if not store.backend.exists():
         initial_data = {
             "categories": [
                 {"id": "games", "name": "游戏", "icon": "🎮"},
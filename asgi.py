@@ -0,0 +1,188 @@
+"""
+ASGI 入口 - 公开的只读接口在事件循环中直接处理，管理后台等其余路由交给线程池里的 Flask
+
+用法（需要另外安装 uvicorn）：
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+    gunicorn -k uvicorn.workers.UvicornWorker -w 1 -b 0.0.0.0:5001 asgi:app
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import HTTPException
+
+from app import app as flask_app
+from app import click_buffer, config, store
+
+# 可以在事件循环中直接执行的端点：只读内存中的数据（或只写点击缓冲），不会长时间阻塞。
+# 存储需要刷新时（其他 worker 写入过、本进程正在写入或合并日志）仍交给线程池，见 AsgiApp.is_inline
+INLINE_ENDPOINTS = frozenset((
+    'index',
+    'api_get_resources',
+    'api_get_categories',
+    'api_get_announcement',
+    'api_suggest',
+    'api_record_click',
+))
+
+# 请求体大小上限（字节），超过时返回 413
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+# 流式响应（如导出）每次发送的最小字节数
+STREAM_BLOCK = 64 * 1024
+
+
+def build_environ(scope, body):
+    """由 ASGI scope 和请求体构造 WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'CONTENT_LENGTH':
+            continue
+        else:
+            key = 'HTTP_' + name
+            environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+def start_wsgi(environ):
+    """执行 Flask 应用，返回 (状态码, 响应头, 响应体迭代器)"""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+
+    result = flask_app.wsgi_app(environ, start_response)
+    return started['status'], started['headers'], result
+
+
+def read_block(iterator):
+    """从响应体迭代器中读出至少 STREAM_BLOCK 字节（流式导出每行一块，合并后再发送），读完返回 b''"""
+    parts = []
+    size = 0
+    for chunk in iterator:
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_BLOCK:
+            break
+    return b''.join(parts)
+
+
+def close_result(result):
+    if hasattr(result, 'close'):
+        result.close()
+
+
+class AsgiApp:
+    """ASGI 应用
+
+    公开接口读的都是进程内的数据（存储缓存、索引、响应缓存），处理过程不涉及网络等待，
+    直接在事件循环里调用 Flask 视图，省去线程切换；连接的读写交给异步服务器，
+    慢速客户端不再占住一个 worker。其余路由（管理后台、导入导出、登录）可能等待文件锁，
+    放到线程池中执行；点击计数的落盘和存储的刷新同样不会发生在事件循环中。
+    """
+
+    def __init__(self, threads=8):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi-flask')
+        self.url_adapter = flask_app.url_map.bind('localhost')
+
+    def is_inline(self, method, path):
+        """是否在事件循环中直接处理
+
+        只读端点也会在数据过期时刷新存储（读文件、持有存储锁、更新索引），
+        所以只有内存数据已是最新时才直接处理，否则交给线程池完成刷新。
+        """
+        try:
+            endpoint, _ = self.url_adapter.match(path, method=method)
+        except HTTPException:
+            return True  # 404/405 等直接由 Flask 生成错误页
+        return endpoint in INLINE_ENDPOINTS and store.is_current()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        body = b''
+        more = True
+        while more:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            more = message.get('more_body', False)
+            if len(body) > MAX_BODY_SIZE:
+                await self.send_response(send, 413, [(b'content-type', b'text/plain; charset=utf-8')],
+                                         '请求体过大'.encode('utf-8'))
+                return
+
+        environ = build_environ(scope, body)
+        if self.is_inline(scope['method'], scope['path']):
+            status, headers, result = start_wsgi(environ)
+            try:
+                content = b''.join(result)
+            finally:
+                close_result(result)
+            await self.send_response(send, status, headers, content)
+            return
+
+        loop = asyncio.get_running_loop()
+        status, headers, result = await loop.run_in_executor(self.executor, start_wsgi, environ)
+        try:
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            iterator = iter(result)
+            while True:
+                block = await loop.run_in_executor(self.executor, read_block, iterator)
+                if not block:
+                    break
+                await send({'type': 'http.response.body', 'body': block, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            await loop.run_in_executor(self.executor, close_result, result)
+
+    @staticmethod
+    async def send_response(send, status, headers, body):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # 退出前把缓冲的点击数写回存储
+                await asyncio.get_running_loop().run_in_executor(self.executor, click_buffer.flush)
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = AsgiApp(threads=config.get('asgi_threads', 8))
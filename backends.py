@@ -0,0 +1,463 @@
+"""
+存储后端 - JSON 文件（默认，快照 + 追加写入日志）与 SQLite（WAL 模式，单条记录读写）
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from store import atomic_write, atomic_write_json, empty_data, fsync_dir
+
+
+def _replay(entries, after_seq, upserts, deleted):
+    """按顺序应用日志条目
+
+    upserts 为 ID -> 资源（原地更新），deleted 收集被删除的 ID，
+    跳过序号不大于 after_seq 的条目（已经合并进快照），返回最新的分类列表或 None。
+    """
+    categories = None
+    for entry in entries:
+        if entry.get('seq', 0) <= after_seq:
+            continue
+        for resource in entry.get('resources', ()):
+            upserts[resource.get('id')] = resource
+            deleted.discard(resource.get('id'))
+        for rid in entry.get('deleted', ()):
+            upserts.pop(rid, None)
+            deleted.add(rid)
+        if 'categories' in entry:
+            categories = entry['categories']
+    return categories
+
+
+def _entry_weight(entry):
+    """日志条目涉及的记录数（批量导入一条日志可能包含上千个资源，按记录数决定何时合并）"""
+    if entry.get('op') == 'compact':
+        return 0
+    return max(len(entry.get('resources', ())) + len(entry.get('deleted', ())), 1)
+
+
+class JsonBackend:
+    """JSON 文件存储（快照 + 追加写入日志）
+
+    resources.json 是快照，记录它已合并到的日志序号 journal_seq；每次修改只向
+    resources.json.journal 追加一行带序号的 JSON（新增/修改/点击写入资源全文，删除写 ID），
+    fsync 后即持久化，写入量与修改的大小成正比。日志累计涉及 compact_after 条记录后由存储层
+    在后台合并进快照：先原子替换快照，再原子替换日志（新日志第一行记录快照的序号）。
+    中途崩溃时日志中已合并的条目会按序号跳过，不会重复应用。
+    """
+
+    name = 'json'
+    # 快照总是 rename 替换（inode 改变），日志只追加（大小只增不减），指纹足以判断是否变化
+    exact_stamp = True
+
+    def __init__(self, path, compact_after=500):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.lock_path = path + '.lock'
+        self.compact_after = compact_after
+        # 已读到的日志位置：(inode, 偏移, 最大序号, 未合并的条目数)
+        self._journal = (None, 0, 0, 0)
+
+    def exists(self):
+        return os.path.exists(self.path) or os.path.exists(self.journal_path)
+
+    def _snapshot_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _journal_stat(self):
+        try:
+            st = os.stat(self.journal_path)
+        except FileNotFoundError:
+            return None, 0
+        return st.st_ino, st.st_size
+
+    def stamp(self):
+        """指纹：(快照 (mtime_ns, size, inode), 日志 inode, 日志大小)，没有任何数据时为 None"""
+        snapshot = self._snapshot_stamp()
+        ino, size = self._journal_stat()
+        if snapshot is None and ino is None:
+            return None
+        return (snapshot, ino, size)
+
+    def last_modified(self):
+        """最后修改时间（Unix 时间戳），没有数据时为 None"""
+        mtimes = []
+        for path in (self.path, self.journal_path):
+            try:
+                mtimes.append(os.stat(path).st_mtime)
+            except FileNotFoundError:
+                pass
+        return max(mtimes) if mtimes else None
+
+    def _read_journal(self, offset):
+        """从 offset 起读取完整的日志行，返回 (inode, 条目列表, 新偏移)
+
+        最后一行没有换行符说明正在写入（或写入时崩溃），留到下次再读；
+        崩溃留下的半行在下一次追加前会被补上换行，解析失败的行直接跳过。
+        """
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return None, [], 0
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_size < offset:
+                return None, [], 0  # 比读过的位置还短：已经不是同一个文件（inode 被复用）
+            ino = st.st_ino
+            f.seek(offset)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1
+        entries = []
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return ino, entries, offset + end
+
+    def _track(self, ino, offset, entries, base_seq=0, pending=0):
+        """记录读到的日志位置、最大序号和未合并条目数"""
+        last_seq = max([base_seq] + [e.get('seq', 0) for e in entries])
+        pending += sum(_entry_weight(e) for e in entries)
+        self._journal = (ino, offset, last_seq, pending)
+
+    def load(self):
+        """读取快照并重放日志，返回 (数据, 指纹)"""
+        for _ in range(3):
+            before = self.stamp()
+            if before is None:
+                self._journal = (None, 0, 0, 0)
+                return empty_data(), None
+            data = empty_data()
+            if before[0] is not None:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            base_seq = data.pop('journal_seq', 0)
+            ino, entries, offset = self._read_journal(0)
+            if self._snapshot_stamp() != before[0] or ino != before[1]:
+                continue  # 读取期间另一个 worker 合并了日志，重新读取
+            if entries and entries[0].get('op') == 'compact' and entries[0].get('seq', 0) > base_seq:
+                continue  # 日志比快照新：快照已被替换，重新读取
+
+            by_id = {r.get('id'): r for r in data.get('resources', [])}
+            categories = _replay(entries, base_seq, by_id, set())
+            if categories is not None:
+                data['categories'] = categories
+            data['resources'] = list(by_id.values())
+            self._track(ino, offset, entries, base_seq)
+            return data, (before[0], ino, offset)
+        raise ValueError('数据文件正在合并，稍后重试')
+
+    def changes_since(self, stamp):
+        """快照未变化时只读取日志新增的部分：(新指纹, 新增或修改的资源, 删除的资源 ID, 分类或 None)"""
+        if stamp is None:
+            return None
+        snapshot, ino, offset = stamp
+        if self._snapshot_stamp() != snapshot:
+            return None
+        new_ino, entries, new_offset = self._read_journal(offset)
+        if new_ino != ino and not (ino is None and offset == 0):
+            return None
+        upserts = {}
+        deleted = set()
+        categories = _replay(entries, 0, upserts, deleted)
+        _, _, last_seq, pending = self._journal
+        self._track(new_ino, new_offset, entries, last_seq, pending)
+        return (snapshot, new_ino, new_offset), list(upserts.values()), list(deleted), categories
+
+    def _sync_journal(self):
+        """追加前确认已知的最大序号是最新的（需持有写锁），返回日志末尾是否有未完成的半行"""
+        ino, size = self._journal_stat()
+        known_ino, offset, last_seq, pending = self._journal
+        if ino is None:
+            if os.path.exists(self.path):
+                # 日志不存在（旧版本数据或被手动删除），从快照中取已合并的序号
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    last_seq = json.load(f).get('journal_seq', 0)
+            self._journal = (None, 0, last_seq, 0)
+            return False
+        if ino != known_ino or size < offset:
+            offset, last_seq, pending = 0, 0, 0
+        if size != offset:
+            ino, entries, offset = self._read_journal(offset)
+            self._track(ino, offset, entries, last_seq, pending)
+        return size != self._journal[1]
+
+    def _append(self, op, **fields):
+        """向日志追加一条记录并 fsync"""
+        torn = self._sync_journal()
+        ino, offset, last_seq, pending = self._journal
+        entry = dict(seq=last_seq + 1, op=op, **fields)
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+        if torn:
+            line = '\n' + line
+        created = ino is None
+        os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode('utf-8'))
+            os.fsync(fd)
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        if created:
+            fsync_dir(os.path.dirname(self.journal_path) or '.')
+        self._journal = (st.st_ino, st.st_size, last_seq + 1, pending + _entry_weight(entry))
+
+    def needs_compaction(self):
+        return self._journal[3] >= self.compact_after
+
+    def compact(self, data):
+        """把完整数据写成新快照并清空日志（需持有写锁，data 须已包含日志中的全部修改）"""
+        self._sync_journal()
+        last_seq = self._journal[2]
+        snapshot = dict(data, journal_seq=last_seq)
+        atomic_write_json(self.path, snapshot)
+        header = json.dumps({"seq": last_seq, "op": "compact"}) + '\n'
+        atomic_write(self.journal_path, header.encode('utf-8'))
+        self._journal = (os.stat(self.journal_path).st_ino, len(header), last_seq, 0)
+
+    def write_all(self, data):
+        """整体替换（迁移、导入时使用）"""
+        self.compact(data)
+
+    def insert_resources(self, data, resources):
+        self._append('insert', resources=list(resources))
+
+    def update_resources(self, data, resources):
+        self._append('update', resources=list(resources))
+
+    def delete_resources(self, data, resource_ids):
+        self._append('delete', deleted=list(resource_ids))
+
+    def add_clicks(self, data, counts):
+        # 记录点击后的完整资源而不是增量，重放多少次结果都一样
+        self._append('click', resources=[r for r in data.get('resources', []) if r.get('id') in counts])
+
+    def write_categories(self, data):
+        self._append('categories', categories=data.get('categories', []))
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    position INTEGER NOT NULL,
+    id TEXT PRIMARY KEY,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resources (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    category TEXT,
+    created_at TEXT,
+    clicks INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_resources_category ON resources (category);
+CREATE INDEX IF NOT EXISTS idx_resources_created_at ON resources (created_at);
+CREATE INDEX IF NOT EXISTS idx_resources_clicks ON resources (clicks);
+CREATE INDEX IF NOT EXISTS idx_resources_version ON resources (version);
+CREATE TABLE IF NOT EXISTS tombstones (
+    id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_version ON tombstones (version);
+"""
+
+
+def _resource_doc(resource):
+    """资源 JSON（点击数单独存一列，点击时只更新这一列）"""
+    doc = dict(resource)
+    doc.pop('clicks', None)
+    return json.dumps(doc, ensure_ascii=False, separators=(',', ':'))
+
+
+def _resource_row(resource, version):
+    return (resource.get('id'), resource.get('category'), resource.get('created_at'),
+            resource.get('clicks', 0) or 0, version, _resource_doc(resource))
+
+
+def _row_resource(clicks, doc):
+    resource = json.loads(doc)
+    resource['clicks'] = clicks
+    return resource
+
+
+class SqliteBackend:
+    """SQLite 存储（WAL 模式）
+
+    每条资源一行，新增/修改/删除/点击都只写涉及的行。meta 表中的 generation
+    在每次写事务中递增，同时写入被修改行的 version 和删除记录的 tombstones，
+    其他 worker 据此只读取变化的行，无需整体重新加载。
+    """
+
+    name = 'sqlite'
+    exact_stamp = True
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self._local = threading.local()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _conn(self):
+        """每个进程/线程各自一个连接（gunicorn fork 之后不能复用父进程的连接）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(_SCHEMA)
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0)")
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('categories_version', 0)")
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('modified_at', 0)")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def needs_compaction(self):
+        """WAL 由 SQLite 自动检查点，不需要额外合并"""
+        return False
+
+    def _meta(self, conn, key):
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def stamp(self):
+        return self._meta(self._conn(), 'generation')
+
+    def last_modified(self):
+        return self._meta(self._conn(), 'modified_at') or None
+
+    def _write(self, fn, categories_changed=False):
+        """在一个写事务中执行 fn(conn, version)，generation 加一"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version = self._meta(conn, 'generation') + 1
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (version,))
+            conn.execute("UPDATE meta SET value = ? WHERE key = 'modified_at'", (int(time.time()),))
+            if categories_changed:
+                conn.execute("UPDATE meta SET value = ? WHERE key = 'categories_version'", (version,))
+            fn(conn, version)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _load_categories(self, conn):
+        return [json.loads(doc) for (doc,) in
+                conn.execute('SELECT doc FROM categories ORDER BY position')]
+
+    def load(self):
+        conn = self._conn()
+        conn.execute('BEGIN')
+        try:
+            stamp = self._meta(conn, 'generation')
+            data = {
+                "categories": self._load_categories(conn),
+                "resources": [_row_resource(clicks, doc) for clicks, doc in
+                              conn.execute('SELECT clicks, doc FROM resources ORDER BY seq')],
+            }
+        finally:
+            conn.execute('COMMIT')
+        return data, stamp
+
+    def changes_since(self, stamp):
+        """读取 stamp 之后的变化：(新指纹, 新增或修改的资源, 删除的资源 ID, 分类或 None)"""
+        if stamp is None:
+            return None
+        conn = self._conn()
+        conn.execute('BEGIN')
+        try:
+            new_stamp = self._meta(conn, 'generation')
+            upserts = [_row_resource(clicks, doc) for clicks, doc in conn.execute(
+                'SELECT clicks, doc FROM resources WHERE version > ? ORDER BY seq', (stamp,))]
+            deleted = [rid for (rid,) in conn.execute(
+                'SELECT id FROM tombstones WHERE version > ?', (stamp,))]
+            categories = None
+            if self._meta(conn, 'categories_version') > stamp:
+                categories = self._load_categories(conn)
+        finally:
+            conn.execute('COMMIT')
+        return new_stamp, upserts, deleted, categories
+
+    def _replace_categories(self, conn, categories):
+        conn.execute('DELETE FROM categories')
+        conn.executemany('INSERT INTO categories (position, id, doc) VALUES (?, ?, ?)', [
+            (i, c.get('id'), json.dumps(c, ensure_ascii=False)) for i, c in enumerate(categories)])
+
+    def write_all(self, data):
+        """整体替换（迁移、导入时使用）"""
+        def fn(conn, version):
+            conn.execute('INSERT OR REPLACE INTO tombstones (id, version) SELECT id, ? FROM resources', (version,))
+            conn.execute('DELETE FROM resources')
+            conn.executemany(
+                'INSERT INTO resources (id, category, created_at, clicks, version, doc) VALUES (?, ?, ?, ?, ?, ?)',
+                [_resource_row(r, version) for r in data.get('resources', [])])
+            conn.execute('DELETE FROM tombstones WHERE id IN (SELECT id FROM resources)')
+            self._replace_categories(conn, data.get('categories', []))
+        self._write(fn, categories_changed=True)
+
+    def insert_resources(self, data, resources):
+        def fn(conn, version):
+            conn.executemany(
+                'INSERT INTO resources (id, category, created_at, clicks, version, doc) VALUES (?, ?, ?, ?, ?, ?)',
+                [_resource_row(r, version) for r in resources])
+            conn.executemany('DELETE FROM tombstones WHERE id = ?', [(r.get('id'),) for r in resources])
+        self._write(fn)
+
+    def update_resources(self, data, resources):
+        def fn(conn, version):
+            conn.executemany('UPDATE resources SET category = ?, created_at = ?, clicks = ?, version = ?, doc = ? '
+                             'WHERE id = ?', [row[1:] + row[:1] for row in
+                                              (_resource_row(r, version) for r in resources)])
+        self._write(fn)
+
+    def delete_resources(self, data, resource_ids):
+        def fn(conn, version):
+            conn.executemany('DELETE FROM resources WHERE id = ?', [(rid,) for rid in resource_ids])
+            conn.executemany('INSERT OR REPLACE INTO tombstones (id, version) VALUES (?, ?)',
+                             [(rid, version) for rid in resource_ids])
+        self._write(fn)
+
+    def add_clicks(self, data, counts):
+        def fn(conn, version):
+            conn.executemany('UPDATE resources SET clicks = clicks + ?, version = ? WHERE id = ?',
+                             [(delta, version, rid) for rid, delta in counts.items()])
+        self._write(fn)
+
+    def write_categories(self, data):
+        def fn(conn, version):
+            self._replace_categories(conn, data.get('categories', []))
+        self._write(fn, categories_changed=True)
+
+
+def create_backend(config, data_dir):
+    """根据 config.json 中的 storage_backend 创建存储后端"""
+    kind = config.get('storage_backend', 'json')
+    if kind == 'sqlite':
+        path = config.get('sqlite_path') or 'data/resources.db'
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(data_dir), path)
+        return SqliteBackend(path)
+    if kind != 'json':
+        raise ValueError(f"未知的存储后端: {kind}")
+    return JsonBackend(os.path.join(data_dir, 'resources.json'),
+                       compact_after=config.get('journal_compact_entries', 500))
@@ -0,0 +1,121 @@
+"""
+生成合成资源目录 - 中文标题、标签、点击数分布接近真实站点
+
+用法:
+    python bench/catalog.py --size 10000 --out /tmp/resources.json
+    python bench/catalog.py --size 100000 --site /tmp/bench-site   # 复制一份项目并写入数据和配置
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+from datetime import datetime, timedelta
+
+from common import REPO_DIR
+
+SIZES = (1000, 10000, 100000)
+
+CATEGORIES = [
+    {"id": "games", "name": "游戏", "icon": "🎮"},
+    {"id": "software", "name": "软件", "icon": "💻"},
+    {"id": "movies", "name": "影视", "icon": "🎬"},
+    {"id": "music", "name": "音乐", "icon": "🎵"},
+    {"id": "ebooks", "name": "电子书", "icon": "📚"},
+    {"id": "other", "name": "其他", "icon": "📦"},
+]
+
+_WORDS = {
+    "games": ["原神", "黑神话", "悟空", "艾尔登法环", "赛博朋克", "塞尔达", "传说", "荒野之息", "只狼", "怪物猎人",
+              "仙剑奇侠传", "古剑奇谭", "三国志", "太吾绘卷", "戴森球计划", "Steam", "豪华版", "全DLC", "中文版"],
+    "software": ["Photoshop", "Office", "剪映", "专业版", "绿色版", "Windows", "激活工具", "AutoCAD", "Premiere",
+                 "视频剪辑", "PDF", "编辑器", "破解版", "便携版", "Mac", "安装包", "2024"],
+    "movies": ["流浪地球", "满江红", "狂飙", "三体", "庆余年", "繁花", "漫长的季节", "4K", "蓝光", "国语", "中字",
+               "全集", "纪录片", "动漫", "电视剧", "高清", "合集"],
+    "music": ["周杰伦", "无损", "FLAC", "演唱会", "林俊杰", "陈奕迅", "精选集", "古典", "钢琴曲", "轻音乐",
+              "专辑", "Hi-Res", "车载音乐", "经典老歌"],
+    "ebooks": ["三体", "平凡的世界", "活着", "百年孤独", "Python", "编程", "入门", "经济学", "原理", "EPUB",
+               "MOBI", "PDF", "网络小说", "全本", "精校版", "历史"],
+    "other": ["考研", "资料", "公务员", "真题", "素材", "PPT", "模板", "壁纸", "字体", "课程", "教程", "合集"],
+}
+
+_SIZES = ["512MB", "1.2GB", "3.5GB", "8GB", "15GB", "42GB", "120MB", "68GB", "2.1GB"]
+_TAGS = ["热门", "推荐", "最新", "高清", "无损", "中文", "完整版", "免安装"]
+
+
+def make_resource(i, rng, start):
+    category = CATEGORIES[rng.randrange(len(CATEGORIES))]['id']
+    words = rng.sample(_WORDS[category], 3)
+    created = start + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+    return {
+        "id": f"res_{i:08x}",
+        "title": ' '.join(words) + f" {i}",
+        "description": f"{words[0]}{words[1]}资源分享，{rng.choice(_SIZES)}，夸克网盘高速下载。",
+        "category": category,
+        "link": f"https://pan.quark.cn/s/{i:012x}",
+        "size": rng.choice(_SIZES),
+        "tags": rng.sample(_TAGS, rng.randrange(0, 3)),
+        # 长尾分布：少数资源点击很多
+        "clicks": int(rng.paretovariate(1.2) * 10) - 10,
+        "created_at": created.isoformat(),
+        "updated_at": created.isoformat(),
+    }
+
+
+def generate(size, seed=42):
+    """生成 size 个资源的完整数据（同一 seed 结果相同，便于前后比较）"""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    return {
+        "categories": [dict(c) for c in CATEGORIES],
+        "resources": [make_resource(i, rng, start) for i in range(size)],
+    }
+
+
+def make_site(site_dir, data, password='bench'):
+    """复制一份项目代码到 site_dir 并写入数据和配置，用于压测，不会碰到真实数据"""
+    if os.path.exists(site_dir):
+        shutil.rmtree(site_dir)
+    shutil.copytree(REPO_DIR, site_dir,
+                    ignore=shutil.ignore_patterns('.git', '__pycache__', 'data', 'bench', 'venv', 'config.json'))
+    os.makedirs(os.path.join(site_dir, 'data'))
+    with open(os.path.join(site_dir, 'data', 'resources.json'), 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    config = {
+        "site_title": "压测站点",
+        "site_description": "benchmark",
+        "admin_password": password,
+        "items_per_page": 12,
+        "secret_key": "bench-secret-key",
+        "click_flush_interval": 1,
+    }
+    with open(os.path.join(site_dir, 'config.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成合成资源目录')
+    parser.add_argument('--size', type=int, default=10000, help=f'资源数量（常用 {"/".join(map(str, SIZES))}）')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='输出 resources.json 路径')
+    parser.add_argument('--site', help='复制项目到该目录并写入数据，便于启动压测用的服务')
+    parser.add_argument('--password', default='bench', help='压测站点的后台密码')
+    args = parser.parse_args(argv)
+    if not args.out and not args.site:
+        parser.error('需要 --out 或 --site')
+
+    data = generate(args.size, args.seed)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        print(f"✅ 已生成 {args.size} 个资源: {args.out}")
+    if args.site:
+        make_site(args.site, data, args.password)
+        print(f"✅ 压测站点: {args.site}（后台密码 {args.password}）")
+        print(f"   启动: cd {args.site} && gunicorn -w 2 -b 127.0.0.1:5001 app:app")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
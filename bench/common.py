@@ -0,0 +1,59 @@
+"""
+基准测试公共函数 - 路径设置、分位数统计、与基线结果比较
+"""
+import json
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+
+def percentile(samples, q):
+    """样本的 q 分位数（最近秩法），samples 需已排序"""
+    if not samples:
+        return 0.0
+    rank = max(int(round(q * len(samples) + 0.5)) - 1, 0)
+    return samples[min(rank, len(samples) - 1)]
+
+
+def summarize(samples, elapsed=None):
+    """耗时样本（秒）汇总为毫秒统计；给出总耗时时附带吞吐量"""
+    samples = sorted(samples)
+    result = {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3) if samples else 0.0,
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+    }
+    if elapsed:
+        result["rps"] = round(len(samples) / elapsed, 1)
+    return result
+
+
+def save_results(path, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def compare_results(results, baseline_path, tolerance):
+    """与基线比较 p99，超过 (1 + tolerance) 倍的记为退化，返回退化列表"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base or not base.get('p99_ms'):
+            continue
+        if stats['p99_ms'] > base['p99_ms'] * (1 + tolerance):
+            regressions.append((name, base['p99_ms'], stats['p99_ms']))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'名称':<36}{'次数':>8}{'p50(ms)':>12}{'p99(ms)':>12}{'max(ms)':>12}{'rps':>10}")
+    for name, stats in results.items():
+        print(f"{name:<36}{stats['count']:>8}{stats['p50_ms']:>12}{stats['p99_ms']:>12}"
+              f"{stats['max_ms']:>12}{stats.get('rps', ''):>10}")
@@ -0,0 +1,190 @@
+"""
+压测 - 并发请求前台列表、点击计数和后台写入，统计各类请求的 p50/p99 延迟和吞吐量
+
+先用 catalog.py 生成一个压测站点并启动服务，再运行:
+    python bench/loadgen.py --url http://127.0.0.1:5001 --duration 30 --concurrency 16
+    python bench/loadgen.py --url ... --save load.json / --compare load.json
+"""
+import argparse
+import gzip
+import http.cookiejar
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from common import compare_results, print_table, save_results, summarize
+from catalog import CATEGORIES, _WORDS
+
+SORTS = ['newest', 'popular', 'oldest', 'name']
+
+
+class Client:
+    """带 Cookie 的简单 HTTP 客户端（每个并发线程一个）"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies))
+
+    def request(self, method, path, body=None, form=None):
+        data = None
+        headers = {'Accept-Encoding': 'gzip'}
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            data = urllib.parse.urlencode(form).encode('utf-8')
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                body = response.read()
+                if response.headers.get('Content-Encoding') == 'gzip':
+                    body = gzip.decompress(body)
+                return response.status, body
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def login(self, password):
+        """登录后台，成功返回 True
+
+        密码错误时登录页同样返回 200（成功时的重定向也会被跟随），只有成功登录才会写入会话 Cookie。
+        """
+        status, _ = self.request('POST', '/admin/login', form={'password': password})
+        return status < 400 and any(cookie.name == 'session' for cookie in self.cookies)
+
+
+class LoadGenerator:
+    """按权重混合三类请求：列表浏览、点击计数、后台写入"""
+
+    def __init__(self, base_url, password, mix, seed=0):
+        self.base_url = base_url
+        self.password = password
+        self.mix = mix
+        self.seed = seed
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+        self._resource_ids = []
+
+    def _record(self, name, elapsed, ok):
+        with self._lock:
+            self.samples.setdefault(name, []).append(elapsed)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def prepare(self):
+        """取一批资源 ID 用于点击请求；包含后台写入时先确认密码正确，避免压测结果全是 401"""
+        client = Client(self.base_url)
+        if self.mix['write'] and not client.login(self.password):
+            raise RuntimeError('后台登录失败，请检查 --password')
+        status, body = client.request('GET', '/api/resources?limit=100&sort=popular')
+        if status != 200:
+            raise RuntimeError(f'无法访问 {self.base_url}/api/resources（HTTP {status}）')
+        self._resource_ids = [r['id'] for r in json.loads(body)['resources']]
+
+    def browse(self, client, rng):
+        params = {'sort': rng.choice(SORTS), 'page': rng.randint(1, 20)}
+        roll = rng.random()
+        if roll < 0.3:
+            params['category'] = rng.choice(CATEGORIES)['id']
+        elif roll < 0.5:
+            words = rng.choice(list(_WORDS.values()))
+            params = {'search': rng.choice(words)}
+        elif roll < 0.7:
+            params = {'cursor': '', 'sort': rng.choice(SORTS)}
+        return 'GET /api/resources', client.request('GET', '/api/resources?' + urllib.parse.urlencode(params))
+
+    def click(self, client, rng):
+        rid = rng.choice(self._resource_ids)
+        return 'POST /api/resources/<id>/click', client.request('POST', f'/api/resources/{rid}/click')
+
+    def write(self, client, rng):
+        rid_suffix = f'{rng.getrandbits(48):012x}'
+        status, body = client.request('POST', '/api/admin/resources', body={
+            "title": f"压测资源 {rid_suffix}", "link": f"https://pan.quark.cn/s/bench{rid_suffix}",
+            "category": rng.choice(CATEGORIES)['id'], "tags": ["压测"]})
+        if status == 200:
+            rid = json.loads(body)['resource']['id']
+            client.request('DELETE', f'/api/admin/resources/{rid}')
+        return 'POST+DELETE /api/admin/resources', (status, body)
+
+    def worker(self, index, deadline):
+        rng = random.Random(self.seed * 1000 + index)
+        client = Client(self.base_url)
+        if self.mix['write'] and not client.login(self.password):
+            raise RuntimeError('后台登录失败，请检查 --password')
+        actions = [(self.browse, self.mix['browse']), (self.click, self.mix['click']), (self.write, self.mix['write'])]
+        funcs = [fn for fn, weight in actions if weight]
+        weights = [weight for _, weight in actions if weight]
+        while time.monotonic() < deadline:
+            fn = rng.choices(funcs, weights)[0]
+            start = time.perf_counter()
+            try:
+                name, (status, _) = fn(client, rng)
+                ok = status < 400
+            except OSError:
+                name, ok = fn.__name__, False
+            self._record(name, time.perf_counter() - start, ok)
+
+    def run(self, concurrency, duration):
+        self.prepare()
+        deadline = time.monotonic() + duration
+        threads = [threading.Thread(target=self.worker, args=(i, deadline), daemon=True) for i in range(concurrency)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        results = {name: summarize(samples, elapsed) for name, samples in sorted(self.samples.items())}
+        all_samples = [s for samples in self.samples.values() for s in samples]
+        results['ALL'] = summarize(all_samples, elapsed)
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='前台/后台接口压测')
+    parser.add_argument('--url', default='http://127.0.0.1:5001', help='服务地址')
+    parser.add_argument('--password', default='bench', help='后台密码（后台写入需要）')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20, help='压测时长（秒）')
+    parser.add_argument('--mix', default='browse=80,click=18,write=2', help='各类请求的权重')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='把结果保存为 JSON（可作为基线）')
+    parser.add_argument('--compare', help='与基线 JSON 比较')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的 p99 退化比例')
+    args = parser.parse_args(argv)
+
+    mix = {'browse': 0, 'click': 0, 'write': 0}
+    for part in args.mix.split(','):
+        key, _, value = part.partition('=')
+        if key.strip() not in mix:
+            parser.error(f'未知的请求类型: {key}')
+        mix[key.strip()] = float(value)
+
+    generator = LoadGenerator(args.url, args.password, mix, args.seed)
+    results = generator.run(args.concurrency, args.duration)
+    print_table(results)
+    for name, count in sorted(generator.errors.items()):
+        print(f"⚠️ {name}: {count} 个请求失败")
+
+    if args.save:
+        save_results(args.save, results)
+    if args.compare:
+        regressions = compare_results(results, args.compare, args.tolerance)
+        for name, before, after in regressions:
+            print(f"❌ {name}: p99 {before}ms -> {after}ms")
+        if regressions:
+            return 1
+        print("✅ 没有超出容差的退化")
+    return 1 if generator.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
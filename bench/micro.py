@@ -0,0 +1,148 @@
+"""
+微基准 - 数据加载、搜索、排序、分页、序列化、写入的耗时
+
+用法:
+    python bench/micro.py                              # 1k/10k 两档，JSON 存储
+    python bench/micro.py --sizes 100000 --backend sqlite
+    python bench/micro.py --save baseline.json         # 保存结果作为基线
+    python bench/micro.py --compare baseline.json      # 与基线比较，p99 退化超过 20% 时返回 1
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from common import compare_results, print_table, save_results, summarize
+from catalog import CATEGORIES, generate
+
+from backends import JsonBackend, SqliteBackend
+from catalog_stats import CatalogStats
+from link_index import LinkIndex
+from models import Resource
+from search_index import SearchIndex
+from sorted_views import SORT_ORDERS, SortedViews, sort_resources
+from store import ResourceStore
+
+QUERIES = ['原神', '三体', '周杰伦 无损', 'photoshop', '考研 真题', '4K 蓝光', 'steam', '黑神话 悟空', '编程 入门', 'PDF']
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def open_store(backend_name, workdir, data):
+    if backend_name == 'sqlite':
+        backend = SqliteBackend(os.path.join(workdir, 'resources.db'))
+        backend.write_all(data)
+    else:
+        with open(os.path.join(workdir, 'resources.json'), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        backend = JsonBackend(os.path.join(workdir, 'resources.json'), compact_after=10 ** 9)
+    store = ResourceStore(backend)
+    indexes = {
+        "search": store.add_index(SearchIndex()),
+        "views": store.add_index(SortedViews()),
+        "stats": store.add_index(CatalogStats()),
+        "links": store.add_index(LinkIndex()),
+    }
+    return store, indexes
+
+
+def run_size(size, backend_name, repeat, rng):
+    workdir = tempfile.mkdtemp(prefix='quark-bench-')
+    try:
+        data = generate(size)
+        store, idx = open_store(backend_name, workdir, data)
+        search, views = idx['search'], idx['views']
+        resources = store.load()['resources']
+        results = {}
+
+        def full_load():
+            store.invalidate()
+            store._by_id = {}
+            store.load()
+        results['load_full'] = timed(full_load, max(repeat // 20, 3))
+        results['load_cached'] = timed(store.load, repeat)
+
+        results['search'] = timed(lambda: search.search(rng.choice(QUERIES)), repeat)
+        results['sort_candidates'] = timed(
+            lambda: sort_resources(rng.sample(resources, min(len(resources), 2000)), rng.choice(list(SORT_ORDERS))),
+            max(repeat // 10, 5))
+
+        def page():
+            category = rng.choice([''] + [c['id'] for c in CATEGORIES])
+            start = rng.randrange(0, max(views.count(category) - 12, 1))
+            store.get_resources(views.page(rng.choice(list(SORT_ORDERS)), category, start, start + 12))
+        results['paginate_offset'] = timed(page, repeat)
+
+        def cursor_walk():
+            after = None
+            for _ in range(10):
+                keys = views.page_after('newest', '', after, 12)
+                if not keys:
+                    break
+                after = keys[-1]
+        results['paginate_cursor_10_pages'] = timed(cursor_walk, max(repeat // 10, 5))
+
+        sample_page = [dict(r) for r in resources[:12]]
+        results['serialize_page_json'] = timed(
+            lambda: json.dumps(sample_page, ensure_ascii=False, separators=(',', ':')), repeat)
+        cached_page = resources[:12]
+        results['serialize_page_fragments'] = timed(
+            lambda: b','.join(Resource.of(r).fragment() for r in cached_page), repeat)
+
+        counter = iter(range(10 ** 9))
+
+        def write():
+            rid = f"bench_{next(counter)}"
+            store.add_resource({"id": rid, "title": "压测 写入", "link": f"https://pan.quark.cn/s/{rid}",
+                                "category": "other", "clicks": 0, "tags": []})
+            store.delete_resources([rid])
+        results['write_add_delete'] = timed(write, max(repeat // 10, 5))
+
+        return {f"{backend_name}/{size}/{name}": summarize(samples) for name, samples in results.items()}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='存储、搜索、分页的微基准')
+    parser.add_argument('--sizes', default='1000,10000', help='资源数量，逗号分隔（如 1000,10000,100000）')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--repeat', type=int, default=200, help='每项重复次数')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save', help='把结果保存为 JSON（可作为基线）')
+    parser.add_argument('--compare', help='与基线 JSON 比较')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的 p99 退化比例')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    results = {}
+    for size in (int(s) for s in args.sizes.split(',') if s.strip()):
+        print(f"… {args.backend} {size} 个资源", file=sys.stderr)
+        results.update(run_size(size, args.backend, args.repeat, rng))
+    print_table(results)
+
+    if args.save:
+        save_results(args.save, results)
+    if args.compare:
+        regressions = compare_results(results, args.compare, args.tolerance)
+        for name, before, after in regressions:
+            print(f"❌ {name}: p99 {before}ms -> {after}ms")
+        if regressions:
+            return 1
+        print("✅ 没有超出容差的退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
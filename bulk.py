@@ -0,0 +1,189 @@
+"""
+批量导入导出 - 流式读取 NDJSON/CSV，逐行校验、按规范化链接去重，一次写入存储
+"""
+import csv
+import io
+import json
+import re
+import uuid
+from datetime import datetime
+
+from link_index import normalize_link
+
+# 支持的格式
+FORMATS = ('ndjson', 'csv')
+
+# CSV 导出的列（tags 用逗号连接）
+CSV_FIELDS = ('id', 'title', 'link', 'category', 'description', 'size', 'tags',
+              'clicks', 'created_at', 'updated_at')
+
+# 错误明细最多返回的条数，其余只计数
+MAX_REPORTED_ERRORS = 1000
+
+_TAG_SEPARATORS = re.compile(r'[,，|]')
+
+
+class RowError(ValueError):
+    """单行数据不合法"""
+
+
+def detect_format(filename='', content_type=''):
+    """根据文件名或 Content-Type 判断格式，默认 NDJSON"""
+    if (filename or '').lower().endswith('.csv') or 'csv' in (content_type or ''):
+        return 'csv'
+    return 'ndjson'
+
+
+def read_rows(stream, fmt):
+    """逐行读取文本流，生成 (行号, 字段字典或 RowError)，不会把整个文件读进内存"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_no, RowError('不是合法的 JSON')
+            continue
+        if not isinstance(row, dict):
+            yield line_no, RowError('每行必须是一个 JSON 对象')
+            continue
+        yield line_no, row
+
+
+def _text(row, field):
+    value = row.get(field)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise RowError(f'{field} 必须是字符串')
+    return value.strip()
+
+
+def _tags(value):
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        return [tag.strip() for tag in _TAG_SEPARATORS.split(value) if tag.strip()]
+    if isinstance(value, list) and all(isinstance(tag, str) for tag in value):
+        return [tag.strip() for tag in value if tag.strip()]
+    raise RowError('tags 必须是字符串列表')
+
+
+def build_resource(row, category_ids, now):
+    """把一行输入转换为资源字典，不合法时抛出 RowError
+
+    导出文件中的点击数、创建时间会被保留，方便整站迁移。
+    """
+    title = _text(row, 'title')
+    link = _text(row, 'link')
+    if not title:
+        raise RowError('标题不能为空')
+    if not link:
+        raise RowError('链接不能为空')
+    category = _text(row, 'category') or 'other'
+    if category_ids is not None and category not in category_ids:
+        raise RowError(f'分类不存在: {category}')
+    try:
+        clicks = int(row.get('clicks') or 0)
+    except (TypeError, ValueError):
+        raise RowError('clicks 必须是整数')
+    created_at = _text(row, 'created_at') or now
+    return {
+        "id": _text(row, 'id'),
+        "title": title,
+        "description": _text(row, 'description'),
+        "category": category,
+        "link": link,
+        "size": _text(row, 'size'),
+        "tags": _tags(row.get('tags')),
+        "clicks": max(clicks, 0),
+        "created_at": created_at,
+        "updated_at": _text(row, 'updated_at') or created_at,
+    }
+
+
+def import_resources(store, links, rows, dry_run=False):
+    """批量导入，返回报告 {imported, skipped, failed, errors}
+
+    links 为注册在 store 上的 LinkIndex，rows 为 read_rows() 的输出。
+    读取和校验在锁外进行（rows 通常边读请求体边生成，上传慢时不能占着写锁）；
+    之后只在存储的写锁内按最新数据去重并一次性写入（JSON 日志一条记录 / SQLite 一个事务）：
+    指向同一分享的链接（与现有资源或本批次之前的行重复）会被跳过，校验之后被删除的分类按失败处理。
+    原有 ID 未被占用时沿用，否则重新生成。
+    """
+    now = datetime.now().isoformat()
+    report = {"imported": 0, "skipped": 0, "failed": 0, "errors": []}
+
+    def reject(line_no, message, key='failed'):
+        report[key] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({"line": line_no, "error": message})
+
+    def category_ids(data):
+        return {c.get('id') for c in data.get('categories', [])} or None
+
+    known_categories = category_ids(store.load())
+    candidates = []
+    for line_no, row in rows:
+        if isinstance(row, RowError):
+            reject(line_no, str(row))
+            continue
+        try:
+            candidates.append((line_no, build_resource(row, known_categories, now)))
+        except RowError as e:
+            reject(line_no, str(e))
+
+    with store.locked() as data:
+        current_categories = category_ids(data)
+        batch_links = set()
+        seen_ids = {r.get('id') for r in data.get('resources', [])}
+        new_resources = []
+        for line_no, resource in candidates:
+            if current_categories is not None and resource['category'] not in current_categories:
+                reject(line_no, f"分类不存在: {resource['category']}")
+                continue
+            key = normalize_link(resource['link'])
+            if key in batch_links or links.contains(key):
+                reject(line_no, f"链接已存在: {resource['link']}", 'skipped')
+                continue
+            if not resource['id'] or resource['id'] in seen_ids:
+                resource['id'] = f"res_{uuid.uuid4().hex[:8]}"
+            batch_links.add(key)
+            seen_ids.add(resource['id'])
+            new_resources.append(resource)
+
+        if new_resources and not dry_run:
+            store.add_resources(new_resources)
+        report['imported'] = len(new_resources)
+    report['errors'].sort(key=lambda error: error['line'])
+    return report
+
+
+def export_ndjson(resources):
+    """逐行生成 NDJSON"""
+    for resource in resources:
+        yield json.dumps(dict(resource), ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def export_csv(resources):
+    """逐行生成 CSV（带 UTF-8 BOM，Excel 打开不乱码）"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    yield '\ufeff' + buffer.getvalue()
+    for resource in resources:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(dict(resource, tags=','.join(resource.get('tags') or [])))
+        yield buffer.getvalue()
+
+
+def export_rows(resources, fmt):
+    """按格式生成导出内容"""
+    return export_csv(resources) if fmt == 'csv' else export_ndjson(resources)
@@ -0,0 +1,49 @@
+"""
+目录统计 - 分类资源数、总点击量等聚合值随数据变化增量维护
+"""
+from store import StoreIndex
+
+
+class CatalogStats(StoreIndex):
+    """资源目录的聚合统计
+
+    新增/删除/修改/点击时只调整受影响的计数，查询是 O(1) 或 O(分类数)，
+    不再需要每次请求遍历全部资源。
+    """
+
+    def __init__(self):
+        self.category_counts = {}
+        self.total_resources = 0
+        self.total_clicks = 0
+
+    def rebuild(self, resources):
+        self.__init__()
+        for resource in resources:
+            self.add(resource)
+
+    def add(self, resource):
+        category = resource.get('category', '')
+        self.category_counts[category] = self.category_counts.get(category, 0) + 1
+        self.total_resources += 1
+        self.total_clicks += resource.get('clicks', 0) or 0
+
+    def remove(self, resource):
+        category = resource.get('category', '')
+        count = self.category_counts.get(category, 0) - 1
+        if count > 0:
+            self.category_counts[category] = count
+        else:
+            self.category_counts.pop(category, None)
+        self.total_resources -= 1
+        self.total_clicks -= resource.get('clicks', 0) or 0
+
+    def update(self, old, new):
+        if old.get('category', '') == new.get('category', ''):
+            self.total_clicks += (new.get('clicks', 0) or 0) - (old.get('clicks', 0) or 0)
+            return
+        self.remove(old)
+        self.add(new)
+
+    def count(self, category):
+        """分类下的资源数量"""
+        return self.category_counts.get(category, 0)
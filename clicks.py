@@ -0,0 +1,82 @@
+"""
+点击计数缓冲 - 在内存中聚合点击增量，定期/达到阈值时批量合并进存储
+"""
+import atexit
+import threading
+
+
+class ClickBuffer:
+    """点击计数缓冲
+
+    每次点击只在内存里累加一个整数（O(1)），由后台线程每隔 interval 秒、
+    或累计 threshold 次点击时，通过 ResourceStore.apply_clicks 在跨进程锁内合并落盘。
+    落盘总在后台线程中进行，记录点击的请求（包括 ASGI 事件循环）不会等待文件锁。
+    进程退出时会把剩余的增量刷进去。
+    """
+
+    def __init__(self, store, interval=5.0, threshold=50):
+        self.store = store
+        self.interval = interval
+        self.threshold = threshold
+        self._pending = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def record(self, resource_id):
+        """记录一次点击，返回本进程中尚未落盘的该资源点击数"""
+        with self._lock:
+            count = self._pending.get(resource_id, 0) + 1
+            self._pending[resource_id] = count
+            self._pending_total += 1
+            if self._pending_total >= self.threshold:
+                self._wake.set()
+            self._ensure_thread()
+        return count
+
+    def pending(self, resource_id):
+        """本进程中尚未落盘的点击数"""
+        return self._pending.get(resource_id, 0)
+
+    def pending_total(self):
+        """本进程中尚未落盘的点击总数"""
+        return self._pending_total
+
+    def flush(self):
+        """把缓冲的点击增量合并进存储"""
+        with self._flush_lock:
+            with self._lock:
+                counts = self._pending
+                self._pending = {}
+                self._pending_total = 0
+            if not counts:
+                return
+            try:
+                self.store.apply_clicks(counts)
+            except Exception:
+                # 写入失败时放回缓冲区，下次再试，避免丢点击
+                with self._lock:
+                    for resource_id, delta in counts.items():
+                        self._pending[resource_id] = self._pending.get(resource_id, 0) + delta
+                        self._pending_total += delta
+                raise
+
+    def _ensure_thread(self):
+        """首次点击时才启动后台线程（gunicorn fork 之后，每个 worker 各自一个），需持有 _lock"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='click-flush', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            # 间隔到期或累计点击数达到阈值时被唤醒
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
@@ -0,0 +1,133 @@
+"""
+响应压缩 - 按 Accept-Encoding 协商 gzip/brotli，静态资源启动时预先压缩
+"""
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只使用 gzip
+    brotli = None
+
+# 支持的编码，按优先级排列
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# 动态响应使用较快的压缩级别，静态资源只压缩一次，用最高级别
+DYNAMIC_LEVELS = {'gzip': 6, 'br': 5}
+STATIC_LEVELS = {'gzip': 9, 'br': 11}
+
+# 动态响应中需要按 Accept-Encoding 压缩的类型
+DYNAMIC_MIMETYPES = ('application/json', 'text/html')
+
+# 值得预压缩的静态文件类型
+STATIC_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.html', '.txt')
+
+
+def negotiate():
+    """根据当前请求的 Accept-Encoding 选择编码，不支持压缩时返回 None"""
+    accepted = request.accept_encodings
+    for encoding in ENCODINGS:
+        if accepted[encoding]:
+            return encoding
+    return None
+
+
+def compress(body, encoding, levels=DYNAMIC_LEVELS):
+    """压缩字节串"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=levels['br'])
+    return gzip.compress(body, compresslevel=levels['gzip'], mtime=0)
+
+
+def tag_etag(response, encoding):
+    """给 ETag 加上编码后缀：不同编码是同一数据的不同表示，强 ETag 不能相同"""
+    etag, weak = response.get_etag()
+    if etag and not etag.endswith('-' + encoding):
+        response.set_etag(f'{etag}-{encoding}', weak)
+
+
+def mark_encoded(response, encoding):
+    """设置 Content-Encoding / Vary 和带编码后缀的 ETag"""
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    tag_etag(response, encoding)
+
+
+def compress_response(response, min_size=1024):
+    """压缩动态 JSON / HTML 响应（after_request 钩子中调用）
+
+    已经带 Content-Encoding 的响应（例如响应缓存里预先压缩好的列表、首页）只补上 ETag 后缀。
+    静态文件由 StaticCompressor 处理。
+    """
+    if response.mimetype not in DYNAMIC_MIMETYPES or request.endpoint == 'static':
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = response.headers.get('Content-Encoding')
+    if response.status_code == 304:
+        encoding = negotiate()
+    elif (encoding is None and response.status_code == 200
+            and not response.direct_passthrough and not response.is_streamed):
+        body = response.get_data()
+        if len(body) >= min_size:
+            encoding = negotiate()
+            if encoding is not None:
+                response.set_data(compress(body, encoding))
+                response.headers['Content-Encoding'] = encoding
+    if encoding:
+        tag_etag(response, encoding)
+    return response
+
+
+class StaticCompressor:
+    """启动时把 static 目录下的文本资源预先压缩好，请求时只按编码取结果"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        # 相对路径 -> (原文件 mtime_ns, {编码: 压缩后的字节串})
+        self._files = {}
+        self.compress_all()
+
+    def compress_all(self):
+        if not self.static_folder or not os.path.isdir(self.static_folder):
+            return
+        for root, _, names in os.walk(self.static_folder):
+            for name in names:
+                if not name.endswith(STATIC_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    body = f.read()
+                variants = {encoding: compress(body, encoding, STATIC_LEVELS) for encoding in ENCODINGS}
+                self._files[rel] = (os.stat(path).st_mtime_ns, variants)
+
+    def apply(self, filename, response):
+        """把 send_static_file 的响应替换为预压缩版本"""
+        response.vary.add('Accept-Encoding')
+        entry = self._files.get(filename)
+        if entry is None or response.status_code != 200:
+            return response
+        mtime_ns, variants = entry
+        try:
+            if os.stat(os.path.join(self.static_folder, filename)).st_mtime_ns != mtime_ns:
+                return response  # 文件在启动后被修改过，预压缩结果已过期
+        except OSError:
+            return response
+        encoding = negotiate()
+        if encoding is None:
+            return response
+        response.close()
+        etag, weak = response.get_etag()
+        if etag and request.if_none_match.contains(f'{etag}-{encoding}'):
+            # 客户端缓存的正是这个压缩版本
+            not_modified = type(response)(status=304)
+            not_modified.headers['Cache-Control'] = response.headers.get('Cache-Control', 'no-cache')
+            not_modified.set_etag(f'{etag}-{encoding}', weak)
+            not_modified.vary.add('Accept-Encoding')
+            return not_modified
+        response.direct_passthrough = False
+        response.set_data(variants[encoding])
+        mark_encoded(response, encoding)
+        return response
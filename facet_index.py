@@ -0,0 +1,175 @@
+"""
+分面索引 - 标签、大小区间、分类的倒排集合，筛选时求交集，并增量维护各分类下的分面计数
+"""
+import re
+
+from store import StoreIndex
+
+_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+_SIZE_RE = re.compile(r'(\d+(?:\.\d+)?)\s*([KMGT])(?:I?B)?(?![A-Z])', re.IGNORECASE)
+
+_GB = 1024 ** 3
+
+# 大小区间：(取值, 显示名, 下限字节, 上限字节)，上限不含，None 表示不限
+SIZE_RANGES = (
+    ('lt1g', '1GB 以下', 0, _GB),
+    ('1g-10g', '1-10GB', _GB, 10 * _GB),
+    ('10g-50g', '10-50GB', 10 * _GB, 50 * _GB),
+    ('gt50g', '50GB 以上', 50 * _GB, None),
+)
+SIZE_LABELS = {value: label for value, label, _, _ in SIZE_RANGES}
+
+# 分面计数中最多返回的标签数（已选中的标签总会返回）
+TOP_TAGS = 30
+
+# 全部分类对应的计数分区
+ALL = ''
+
+_EMPTY = frozenset()
+
+
+def parse_size(text):
+    """解析 "3.5GB"、"512 MB"、"约 2G" 之类的大小，返回字节数；没有单位或无法识别时返回 None"""
+    match = _SIZE_RE.search(str(text or ''))
+    if not match:
+        return None
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def size_range(text):
+    """大小所属的区间取值，无法识别时返回 None"""
+    size = parse_size(text)
+    if size is None:
+        return None
+    for value, _, low, high in SIZE_RANGES:
+        if size >= low and (high is None or size < high):
+            return value
+    return None
+
+
+def resource_tags(resource):
+    """资源的标签（去空白、去重，保持顺序）"""
+    tags = resource.get('tags') or []
+    if not isinstance(tags, list):
+        return ()
+    return tuple(dict.fromkeys(str(t).strip() for t in tags if str(t).strip()))
+
+
+def format_facets(tag_counts, size_counts, selected_tags=()):
+    """接口返回的分面结构：标签按数量从多到少取前 TOP_TAGS 个，大小区间按固定顺序"""
+    tags = sorted(((tag, n) for tag, n in tag_counts.items() if n > 0), key=lambda item: (-item[1], item[0]))
+    shown = tags[:TOP_TAGS]
+    shown += [(tag, tag_counts.get(tag, 0)) for tag in selected_tags if tag not in dict(shown)]
+    return {
+        "tags": [{"value": tag, "count": n} for tag, n in shown],
+        "sizes": [{"value": value, "label": label, "count": size_counts.get(value, 0)}
+                  for value, label, _, _ in SIZE_RANGES],
+    }
+
+
+class FacetIndex(StoreIndex):
+    """标签 / 大小区间 / 分类 -> 资源 ID 集合
+
+    筛选时从最小的集合开始求交集，只有候选集参与后续排序；
+    各分类（及全部分类）下每个标签、每个区间的资源数随增删改增量维护，
+    不带筛选条件时分面计数直接读取，带条件时只统计候选集。
+    """
+
+    def __init__(self):
+        self._tags = {}
+        self._sizes = {}
+        self._categories = {}
+        self._docs = {}
+        self._counts = {}
+
+    def rebuild(self, resources):
+        self.__init__()
+        for resource in resources:
+            self.add(resource)
+
+    @staticmethod
+    def _facets(resource):
+        return resource.get('category', ''), resource_tags(resource), size_range(resource.get('size'))
+
+    def _count(self, category, tags, size, delta):
+        for name in ((ALL, category) if category != ALL else (ALL,)):
+            counts = self._counts.setdefault(name, ({}, {}))
+            for key, table in [(tag, counts[0]) for tag in tags] + [(size, counts[1])]:
+                if key is None:
+                    continue
+                n = table.get(key, 0) + delta
+                if n > 0:
+                    table[key] = n
+                else:
+                    table.pop(key, None)
+
+    def add(self, resource):
+        rid = resource.get('id')
+        if rid is None:
+            return
+        category, tags, size = facets = self._facets(resource)
+        self._docs[rid] = facets
+        self._categories.setdefault(category, set()).add(rid)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(rid)
+        if size is not None:
+            self._sizes.setdefault(size, set()).add(rid)
+        self._count(category, tags, size, 1)
+
+    def remove(self, resource):
+        facets = self._docs.pop(resource.get('id'), None)
+        if facets is None:
+            return
+        rid = resource.get('id')
+        category, tags, size = facets
+        for table, key in [(self._categories, category), (self._sizes, size)] + [(self._tags, t) for t in tags]:
+            ids = table.get(key)
+            if ids is not None:
+                ids.discard(rid)
+                if not ids:
+                    del table[key]
+        self._count(category, tags, size, -1)
+
+    def update(self, old, new):
+        # 点击数等无关字段变化时无需改动
+        if old.get('id') == new.get('id') and self._docs.get(new.get('id')) == self._facets(new):
+            return
+        self.remove(old)
+        self.add(new)
+
+    def filter(self, category=ALL, tags=(), sizes=()):
+        """同时带有全部 tags、大小落在任一 sizes 区间内的资源 ID 集合
+
+        没有标签和大小条件时返回 None，由调用方走预排序视图。
+        """
+        if not tags and not sizes:
+            return None
+        sets = [self._tags.get(tag, _EMPTY) for tag in tags]
+        if sizes:
+            sets.append(set().union(*(self._sizes.get(size, _EMPTY) for size in sizes)))
+        if category:
+            sets.append(self._categories.get(category, _EMPTY))
+        sets.sort(key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def counts(self, ids=None, category=ALL, exclude=()):
+        """分面计数，返回 ({标签: 数量}, {区间: 数量})
+
+        ids 为 None 时取分类下增量维护的计数，再减去 exclude 中（如失效链接）属于该分类的资源；
+        否则只统计 ids 这些候选资源。
+        """
+        if ids is None:
+            tag_counts, size_counts = (dict(table) for table in self._counts.get(category, ({}, {})))
+            ids, sign = exclude, -1
+        else:
+            tag_counts, size_counts, sign = {}, {}, 1
+        docs = self._docs
+        for rid in ids:
+            facets = docs.get(rid)
+            if facets is None or (sign < 0 and category and facets[0] != category):
+                continue
+            for tag in facets[1]:
+                tag_counts[tag] = tag_counts.get(tag, 0) + sign
+            if facets[2] is not None:
+                size_counts[facets[2]] = size_counts.get(facets[2], 0) + sign
+        return tag_counts, size_counts
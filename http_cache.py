@@ -0,0 +1,69 @@
+"""
+HTTP 缓存 - 为公开 JSON 接口生成 ETag / Last-Modified，处理条件请求（304）
+"""
+import hashlib
+import os
+from functools import wraps
+
+from flask import make_response, request
+
+# 各接口默认的 Cache-Control：允许缓存但每次都要重新验证，数据一变立刻生效
+DEFAULT_CACHE_CONTROL = 'public, no-cache'
+
+# 同一数据版本不同编码表示的 ETag 后缀
+ETAG_SUFFIXES = ('', '-gzip', '-br')
+
+
+def file_version(path):
+    """文件的版本信息：((mtime_ns, size), mtime 秒)，文件不存在时为 (None, None)"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None, None
+    return (st.st_mtime_ns, st.st_size), st.st_mtime
+
+
+def make_etag(name, version):
+    """由接口名、数据版本和规范化后的查询参数生成强 ETag"""
+    args = sorted(request.args.items(multi=True))
+    raw = repr((name, version, args)).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:24]
+
+
+def not_modified(etag, last_modified):
+    """判断客户端缓存是否仍然有效（有 If-None-Match 时忽略 If-Modified-Since）"""
+    if request.if_none_match:
+        # 压缩后的响应 ETag 带有编码后缀（见 compression.py），同一数据版本的各个表示都算命中
+        return any(request.if_none_match.contains(etag + suffix) for suffix in ETAG_SUFFIXES)
+    if last_modified is not None and request.if_modified_since is not None:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def conditional(name, version_fn, cache_control_fn):
+    """条件 GET 装饰器
+
+    version_fn() 返回 (数据版本, 最后修改时间)，必须足够廉价：在执行任何筛选、排序、
+    序列化之前就先比对 ETag，命中时直接返回 304。
+    cache_control_fn(name) 返回该接口的 Cache-Control 值。
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            version, last_modified = version_fn()
+            etag = make_etag(name, version)
+
+            if not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = cache_control_fn(name)
+            return response
+        return decorated_function
+    return decorator
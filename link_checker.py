@@ -0,0 +1,231 @@
+"""
+失效链接检测 - 后台线程池按主机限速检查资源链接，结果带有效期写回资源
+"""
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from link_index import normalize_link
+from store import FileLock, StoreIndex
+
+# 链接状态
+OK = 'ok'
+DEAD = 'dead'
+ERROR = 'error'
+
+# 各状态的有效期（秒），过期后才会重新检查；失效和出错的链接更早复查
+DEFAULT_TTL = {OK: 24 * 3600, DEAD: 6 * 3600, ERROR: 3600}
+
+# 分享页面中出现这些文字说明分享已失效（页面本身仍返回 200）
+DEAD_MARKERS = ('分享地址已失效', '文件已被分享者删除', '好友已取消了分享', '该分享已过期', '文件涉及违规')
+
+# 返回这些状态码说明链接已不存在
+DEAD_STATUS_CODES = (404, 410)
+
+# 每个页面最多读取的字节数（失效提示都在页面开头）
+MAX_BODY_BYTES = 64 * 1024
+
+# 搜索按相关度排序时失效链接减去的分数（排到所有有效链接之后）
+DEAD_LINK_PENALTY = 10000
+
+USER_AGENT = 'Mozilla/5.0 (compatible; QuarkShareLinkChecker/1.0)'
+
+_URL = re.compile(r'https?://[^\s\u3000\uff0c\u3002]+')
+
+
+def link_url(link):
+    """资源链接中的 URL 部分（去掉“提取码：xxxx”之类的附加文字，补全协议）"""
+    match = _URL.search(link or '')
+    if match:
+        return match.group(0)
+    tokens = (link or '').split()
+    return 'https://' + tokens[0] if tokens else ''
+
+
+class HostThrottle:
+    """按主机限速：同一主机两次请求之间至少间隔 interval 秒，不同主机互不影响"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, 0))
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class LinkStatusIndex(StoreIndex):
+    """失效链接的资源 ID 集合，列表接口据此过滤或降权
+
+    dead 是 frozenset，变化时整体替换而不是原地修改：检测线程写回结果的同时，
+    请求线程可能正在遍历它（统计、分面计数、失效列表）。失效的资源通常很少，复制的开销可以忽略。
+    """
+
+    def __init__(self):
+        self.dead = frozenset()
+
+    def rebuild(self, resources):
+        self.dead = frozenset(r.get('id') for r in resources if r.get('link_status') == DEAD)
+
+    def add(self, resource):
+        if resource.get('link_status') == DEAD and resource.get('id') not in self.dead:
+            self.dead = self.dead | {resource.get('id')}
+
+    def remove(self, resource):
+        if resource.get('id') in self.dead:
+            self.dead = self.dead - {resource.get('id')}
+
+    def update(self, old, new):
+        if old.get('link_status') != new.get('link_status'):
+            self.remove(old)
+            self.add(new)
+
+    def is_dead(self, resource_id):
+        return resource_id in self.dead
+
+
+class LinkChecker:
+    """资源链接检查器
+
+    用线程池并发请求（并发数 concurrency），同一主机按 per_host_interval 限速。
+    检查结果写回资源的 link_status / link_checked_at 字段，这两个字段同时充当结果缓存：
+    在各状态的有效期内不会重复检查；同一次检查中指向同一分享的链接只请求一次。
+    多个 worker 共用一个非阻塞文件锁，同一时间只有一个进程在检查。
+    """
+
+    def __init__(self, store, lock_path, concurrency=8, per_host_interval=1.0, timeout=10,
+                 ttl=None, dead_markers=DEAD_MARKERS, batch_size=100):
+        self.store = store
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.dead_markers = tuple(dead_markers)
+        self.batch_size = batch_size
+        self.throttle = HostThrottle(per_host_interval)
+        self.file_lock = FileLock(lock_path)
+        self._thread = None
+        self._lock = threading.Lock()
+        # 本进程最近一次检查的进度
+        self.last_run = None
+
+    def check_link(self, link):
+        """检查单个链接，返回 (状态, 说明)"""
+        url = link_url(link)
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            return ERROR, '无法识别的链接'
+        self.throttle.wait(parts.hostname.lower())
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read(MAX_BODY_BYTES).decode('utf-8', 'ignore')
+                status = response.status
+        except urllib.error.HTTPError as e:
+            if e.code in DEAD_STATUS_CODES:
+                return DEAD, f'HTTP {e.code}'
+            return ERROR, f'HTTP {e.code}'
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            return ERROR, str(getattr(e, 'reason', e))[:200]
+        for marker in self.dead_markers:
+            if marker in body:
+                return DEAD, marker
+        return OK, f'HTTP {status}'
+
+    def is_due(self, resource, now):
+        """检查结果是否已过期（从未检查过的也算）"""
+        checked_at = resource.get('link_checked_at')
+        if not checked_at:
+            return True
+        try:
+            checked = datetime.fromisoformat(checked_at)
+        except (TypeError, ValueError):
+            return True
+        ttl = self.ttl.get(resource.get('link_status'), self.ttl[ERROR])
+        return now - checked >= timedelta(seconds=ttl)
+
+    def check_all(self, force=False, resource_ids=None):
+        """检查所有到期的链接，返回报告；其他进程正在检查时返回 None
+
+        force=True 时忽略有效期全部重新检查，resource_ids 限定只检查这些资源。
+        """
+        if not self.file_lock.acquire(blocking=False):
+            return None
+        try:
+            return self._check(force, resource_ids)
+        finally:
+            self.file_lock.release()
+
+    def _check(self, force, resource_ids):
+        now = datetime.now()
+        resources = self.store.load().get('resources', [])
+        if resource_ids is not None:
+            wanted = set(resource_ids)
+            resources = [r for r in resources if r.get('id') in wanted]
+
+        # 规范化链接 -> 需要写回结果的资源 ID
+        targets = {}
+        links = {}
+        for resource in resources:
+            if not force and not self.is_due(resource, now):
+                continue
+            key = normalize_link(resource.get('link'))
+            if key is None:
+                continue
+            targets.setdefault(key, []).append(resource.get('id'))
+            links.setdefault(key, resource.get('link'))
+
+        report = {"started_at": now.isoformat(), "finished_at": None, "total": len(targets),
+                  "checked": 0, OK: 0, DEAD: 0, ERROR: 0}
+        self.last_run = report
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='link-check') as pool:
+            futures = {pool.submit(self.check_link, link): key for key, link in links.items()}
+            for future in as_completed(futures):
+                status, detail = future.result()
+                report['checked'] += 1
+                report[status] += 1
+                checked_at = datetime.now().isoformat()
+                key = futures[future]
+                for rid in targets[key]:
+                    current = self.store.get_resource(rid)
+                    if current is None or normalize_link(current.get('link')) != key:
+                        continue  # 检查期间资源被删除或换了链接
+                    pending[rid] = {"link_status": status, "link_detail": detail, "link_checked_at": checked_at}
+                if len(pending) >= self.batch_size:
+                    self.store.update_resources(pending)
+                    pending = {}
+        if pending:
+            self.store.update_resources(pending)
+        report['finished_at'] = datetime.now().isoformat()
+        return report
+
+    def start(self, interval):
+        """启动后台线程，每 interval 秒检查一次到期的链接（重复调用只启动一个）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(interval,), name='link-checker', daemon=True)
+            self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            try:
+                self.check_all()
+            except Exception:
+                pass  # 网络或存储异常不能让后台线程退出，下一轮再试
+            time.sleep(interval)
+
+    def run_in_background(self, force=False, resource_ids=None):
+        """在后台线程中立即执行一次检查（供管理后台手动触发）"""
+        threading.Thread(target=self.check_all, args=(force, resource_ids),
+                         name='link-check-once', daemon=True).start()
@@ -0,0 +1,92 @@
+"""
+链接去重索引 - 规范化分享链接，O(1) 判断同一个分享是否已经收录
+"""
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from store import StoreIndex
+
+# 夸克网盘分享链接：https://pan.quark.cn/s/<分享 ID>，后面可能跟 ?pwd=、#/list/share 或“提取码”等文字
+_QUARK_SHARE = re.compile(r'/s/([0-9A-Za-z]+)')
+
+# 不影响链接指向的跟踪参数
+TRACKING_PARAMS = {'spm', 'from', 'entry', 'share_source', 'sharefrom', 'fbclid', 'gclid'}
+
+
+def _is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith('utm_')
+
+
+def normalize_link(link):
+    """链接的规范形式，指向同一分享的链接得到相同结果；空链接返回 None
+
+    夸克链接只取分享 ID（提取码属于同一个分享，不参与比较）；其他链接忽略协议、
+    主机名大小写、锚点、末尾斜杠和跟踪参数，其余查询参数排序后保留。
+    """
+    link = (link or '').strip()
+    if not link:
+        return None
+    try:
+        parts = urlsplit(link if '://' in link else 'https://' + link)
+        host = (parts.hostname or '').lower()
+        port = parts.port
+    except ValueError:
+        return link
+    if host == 'quark.cn' or host.endswith('.quark.cn'):
+        match = _QUARK_SHARE.match(parts.path)
+        if match:
+            return 'quark:' + match.group(1)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k))
+    netloc = f'{host}:{port}' if port else host
+    normalized = netloc + (parts.path.rstrip('/') or '')
+    if query:
+        normalized += '?' + urlencode(query)
+    return normalized
+
+
+class LinkIndex(StoreIndex):
+    """规范化链接 -> 资源 ID 集合"""
+
+    def __init__(self):
+        self._ids = {}
+
+    def rebuild(self, resources):
+        self._ids = {}
+        for resource in resources:
+            self.add(resource)
+
+    def add(self, resource):
+        key = normalize_link(resource.get('link'))
+        if key is not None:
+            self._ids.setdefault(key, set()).add(resource.get('id'))
+
+    def remove(self, resource):
+        key = normalize_link(resource.get('link'))
+        ids = self._ids.get(key)
+        if ids is None:
+            return
+        ids.discard(resource.get('id'))
+        if not ids:
+            del self._ids[key]
+
+    def update(self, old, new):
+        if old.get('link') == new.get('link'):
+            return
+        self.remove(old)
+        self.add(new)
+
+    def find(self, link, exclude=None):
+        """与 link 指向同一分享的资源 ID（排除 exclude），没有时返回空列表"""
+        ids = self._ids.get(normalize_link(link), ())
+        return sorted(rid for rid in ids if rid != exclude)
+
+    def contains(self, key):
+        """规范化后的链接是否已收录"""
+        return key in self._ids
+
+    def duplicates(self):
+        """重复收录的链接：[(规范化链接, [资源 ID, ...]), ...]，按重复数量从多到少"""
+        clusters = [(key, sorted(ids)) for key, ids in self._ids.items() if len(ids) > 1]
+        clusters.sort(key=lambda item: (-len(item[1]), item[0]))
+        return clusters
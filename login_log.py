@@ -0,0 +1,155 @@
+"""
+登录日志 - 追加写入的 NDJSON 文件，按大小轮转
+"""
+import json
+import os
+import re
+
+from store import FileLock
+
+# 倒序读取时每次读入的字节数
+READ_BLOCK = 64 * 1024
+
+_TIME = re.compile(rb'"time":"([^"]*)"')
+
+
+class LoginLog:
+    """追加写入的登录日志
+
+    每次登录尝试只向 login_log.ndjson 追加一行（O_APPEND 单次写入，多个 worker 同时写也不会交错），
+    不再读出全部记录再整体重写。文件超过 max_bytes 后轮转为 .1、.2 …，最多保留 backups 个历史文件。
+    """
+
+    def __init__(self, path, max_bytes=1024 * 1024, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = FileLock(path + '.lock')
+
+    def files(self):
+        """现有的日志文件，从新到旧"""
+        paths = [self.path] + [f'{self.path}.{i}' for i in range(1, self.backups + 1)]
+        return [p for p in paths if os.path.exists(p)]
+
+    def append(self, entry):
+        line = (json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        if size >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        """把当前文件改名为 .1，已有的历史文件依次后移，超出 backups 的删除"""
+        with self.lock:
+            try:
+                if os.path.getsize(self.path) < self.max_bytes:
+                    return  # 另一个 worker 已经轮转过了
+            except FileNotFoundError:
+                return
+            for i in range(self.backups, 0, -1):
+                src = f'{self.path}.{i - 1}' if i > 1 else self.path
+                if os.path.exists(src):
+                    os.replace(src, f'{self.path}.{i}')
+
+    def import_legacy(self, legacy_path):
+        """把旧版 login_log.json（整体读写的列表）转换为追加日志，只在新日志不存在时执行一次"""
+        if not os.path.exists(legacy_path) or os.path.exists(self.path):
+            return
+        with self.lock:
+            if os.path.exists(self.path):
+                return
+            try:
+                with open(legacy_path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except ValueError:
+                entries = []
+            for entry in entries:
+                self.append(entry)
+            os.replace(legacy_path, legacy_path + '.migrated')
+
+    def _reverse_lines(self, path, end=None):
+        """从文件末尾（或 end 偏移处）按块向前读取，逐行产出 (行首偏移, 行内容)，最新的在前"""
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            pos = size if end is None else min(end, size)
+            tail = b''
+            while pos > 0:
+                step = min(READ_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + tail).split(b'\n')
+                # 第一段可能是被块边界截断的行，留到下一轮拼接
+                tail = lines[0]
+                offset = pos + len(tail) + 1
+                starts = []
+                for line in lines[1:]:
+                    starts.append(offset)
+                    offset += len(line) + 1
+                for start, line in zip(reversed(starts), reversed(lines[1:])):
+                    if line:
+                        yield start, line
+            if tail:
+                yield 0, tail
+
+    def page(self, limit=50, cursor=None, ip=None, success=None, since=None, until=None):
+        """最新在前的一页记录，返回 (记录列表, 下一页游标)
+
+        从最新的文件末尾倒着读，筛选条件先在原始字节上判断，只有进入本页的行才会解析 JSON；
+        记录按时间追加，读到早于 since 的行即可停止。时间格式为 "YYYY-MM-DD HH:MM:SS"，可直接按字符串比较。
+        游标是 "inode-偏移"，指向本页最后一条记录的行首，下一页从那里继续往前读，
+        文件轮转改名后 inode 不变，翻页不受影响。没有更多记录时游标为 None。
+        """
+        files = []
+        for path in self.files():
+            try:
+                files.append((os.stat(path).st_ino, path))
+            except FileNotFoundError:
+                continue  # 刚好被轮转
+        end = None
+        if cursor:
+            try:
+                ino, end = (int(part) for part in cursor.split('-', 1))
+            except ValueError:
+                return [], None
+            for i, (file_ino, _) in enumerate(files):
+                if file_ino == ino:
+                    files = files[i:]
+                    break
+            else:
+                return [], None  # 游标所在的文件已被轮转删除
+
+        ip_token = b'"ip":' + json.dumps(ip, ensure_ascii=False).encode('utf-8') if ip else None
+        success_token = None if success is None else (b'"success":true' if success else b'"success":false')
+        entries = []
+        next_cursor = None
+        for ino, path in files:
+            try:
+                lines = self._reverse_lines(path, end)
+                for start, line in lines:
+                    if ip_token is not None and ip_token not in line:
+                        continue
+                    if success_token is not None and success_token not in line:
+                        continue
+                    if since or until:
+                        match = _TIME.search(line)
+                        stamp = match.group(1).decode('ascii') if match else ''
+                        if since and stamp < since:
+                            return entries, None
+                        if until and stamp > until:
+                            continue
+                    if len(entries) == limit:
+                        return entries, next_cursor
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # 写到一半的行
+                    next_cursor = f'{ino}-{start}'
+            except FileNotFoundError:
+                pass
+            end = None
+        return entries, None
@@ -0,0 +1,137 @@
+"""
+夸克网盘资源分享网站 - 命令行管理工具
+
+用法:
+    python manage.py migrate-sqlite [--json data/resources.json] [--db data/resources.db]
+    python manage.py import resources.ndjson [--format csv] [--dry-run]
+    python manage.py export [resources.ndjson] [--format csv]
+    python manage.py check-links [--force] [--concurrency 8]
+"""
+import argparse
+import json
+import os
+import sys
+
+from backends import JsonBackend, SqliteBackend, create_backend
+from bulk import FORMATS, detect_format, export_rows, import_resources, read_rows
+from link_checker import DEAD_MARKERS, LinkChecker
+from link_index import LinkIndex
+from store import ResourceStore
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def cmd_migrate_sqlite(args):
+    """把 JSON 数据文件一次性迁移到 SQLite"""
+    if not os.path.exists(args.json):
+        print(f"❌ 找不到数据文件: {args.json}")
+        return 1
+    # 通过 JsonBackend 读取，写入日志中尚未合并进快照的修改也会一并迁移
+    data, _ = JsonBackend(args.json).load()
+
+    backend = SqliteBackend(args.db)
+    if backend.exists() and backend.load()[0]['resources'] and not args.force:
+        print(f"❌ {args.db} 中已有数据，如需覆盖请加 --force")
+        return 1
+    backend.write_all(data)
+
+    migrated, _ = backend.load()
+    print(f"✅ 已迁移 {len(migrated['categories'])} 个分类、{len(migrated['resources'])} 个资源到 {args.db}")
+    print('请在 config.json 中设置 "storage_backend": "sqlite" 后重启服务')
+    return 0
+
+
+def load_config():
+    config_file = os.path.join(BASE_DIR, 'config.json')
+    if not os.path.exists(config_file):
+        return {}
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def open_store(config=None):
+    """按 config.json 打开当前使用的存储（与网站共用写锁，服务运行时也可以执行）"""
+    config = load_config() if config is None else config
+    return ResourceStore(create_backend(config, os.path.join(BASE_DIR, 'data')))
+
+
+def cmd_import(args):
+    """从 NDJSON/CSV 文件批量导入资源"""
+    fmt = args.format or detect_format(args.file)
+    if args.file == '-':
+        stream = open(sys.stdin.fileno(), 'r', encoding='utf-8-sig', newline='', closefd=False)
+    else:
+        stream = open(args.file, 'r', encoding='utf-8-sig', newline='')
+    store = open_store()
+    links = store.add_index(LinkIndex())
+    with stream:
+        report = import_resources(store, links, read_rows(stream, fmt), dry_run=args.dry_run)
+
+    for error in report['errors']:
+        print(f"  第 {error['line']} 行: {error['error']}")
+    action = '校验通过' if args.dry_run else '已导入'
+    print(f"✅ {action} {report['imported']} 个资源，跳过重复 {report['skipped']} 个，失败 {report['failed']} 个")
+    return 1 if report['failed'] else 0
+
+
+def cmd_export(args):
+    """把全部资源导出为 NDJSON/CSV"""
+    fmt = args.format or detect_format(args.file)
+    resources = open_store().load().get('resources', [])
+    if args.file == '-':
+        sys.stdout.writelines(export_rows(resources, fmt))
+        return 0
+    with open(args.file, 'w', encoding='utf-8', newline='') as f:
+        f.writelines(export_rows(resources, fmt))
+    print(f"✅ 已导出 {len(resources)} 个资源到 {args.file}", file=sys.stderr)
+    return 0
+
+
+def cmd_check_links(args):
+    """检查所有到期的资源链接"""
+    config = load_config()
+    checker = LinkChecker(open_store(config), os.path.join(BASE_DIR, 'data', 'link_check.lock'),
+                          concurrency=args.concurrency or config.get('link_check_concurrency', 8),
+                          per_host_interval=config.get('link_check_host_interval', 1.0),
+                          timeout=config.get('link_check_timeout', 10),
+                          dead_markers=config.get('link_check_dead_markers', DEAD_MARKERS))
+    report = checker.check_all(force=args.force)
+    if report is None:
+        print("❌ 另一个进程正在检查链接，请稍后再试")
+        return 1
+    print(f"✅ 检查了 {report['checked']} 个链接：有效 {report['ok']}，失效 {report['dead']}，出错 {report['error']}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='夸克资源站管理工具')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('migrate-sqlite', help='把 data/resources.json 迁移到 SQLite')
+    p.add_argument('--json', default=os.path.join(BASE_DIR, 'data', 'resources.json'), help='JSON 数据文件')
+    p.add_argument('--db', default=os.path.join(BASE_DIR, 'data', 'resources.db'), help='SQLite 数据库文件')
+    p.add_argument('--force', action='store_true', help='覆盖数据库中已有的数据')
+    p.set_defaults(func=cmd_migrate_sqlite)
+
+    p = sub.add_parser('import', help='从 NDJSON/CSV 文件批量导入资源')
+    p.add_argument('file', help='输入文件，- 表示标准输入')
+    p.add_argument('--format', choices=FORMATS, help='文件格式，默认按扩展名判断')
+    p.add_argument('--dry-run', action='store_true', help='只校验，不写入')
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser('export', help='把全部资源导出为 NDJSON/CSV')
+    p.add_argument('file', nargs='?', default='-', help='输出文件，默认输出到标准输出')
+    p.add_argument('--format', choices=FORMATS, help='文件格式，默认按扩展名判断')
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser('check-links', help='检查资源链接是否失效')
+    p.add_argument('--force', action='store_true', help='忽略有效期，全部重新检查')
+    p.add_argument('--concurrency', type=int, help='并发请求数')
+    p.set_defaults(func=cmd_check_links)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+运行指标 - 路由耗时直方图、计数器和接口内部分阶段耗时，输出 Prometheus 文本格式
+"""
+import random
+import threading
+import time
+
+# 耗时直方图的桶上限（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """固定分桶的直方图（非累计存储，输出时再累加）"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """按分桶估算分位数（取所在桶的上限），没有数据时返回 None"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+class _StageTimer:
+    """一次请求内的分阶段计时：mark(name) 记录上一个标记到现在的耗时"""
+
+    def __init__(self, registry, route):
+        self.registry = registry
+        self.route = route
+        self.last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.registry.observe('stage_duration_seconds', now - self.last,
+                              route=self.route, stage=stage)
+        self.last = now
+
+
+class _NullStageTimer:
+    """未抽中或未启用时使用，mark() 什么都不做"""
+
+    def mark(self, stage):
+        pass
+
+
+NULL_STAGES = _NullStageTimer()
+
+
+class Metrics:
+    """进程内指标注册表（每个 worker 进程各自统计）
+
+    enabled 为 False 时 inc/observe 立即返回，stages() 返回空操作的计时器，
+    Flask 钩子也不会注册，开销可以忽略。
+    """
+
+    def __init__(self, enabled=True, sample_rate=0.1, buckets=DEFAULT_BUCKETS, prefix='quarkshare_'):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.buckets = buckets
+        self.prefix = prefix
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._help = {}
+
+    def describe(self, name, help_text):
+        """指标说明（输出为 # HELP 行）"""
+        self._help[name] = help_text
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def stages(self, route):
+        """按 sample_rate 抽样返回分阶段计时器"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return NULL_STAGES
+        return _StageTimer(self, route)
+
+    def register_collector(self, fn):
+        """注册采集函数：输出时调用 fn()，返回 [(指标名, 类型, {标签}, 值), ...]
+
+        用于导出其他组件自己维护的计数（存储读写次数、响应缓存命中等），平时没有任何开销。
+        """
+        self._collectors.append(fn)
+
+    def init_app(self, app):
+        """注册请求耗时钩子（未启用时不注册）"""
+        if not self.enabled:
+            return
+        from flask import g, request
+
+        @app.before_request
+        def _start_timer():
+            g._metrics_start = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            start = g.pop('_metrics_start', None)
+            if start is not None:
+                endpoint = request.endpoint or 'unknown'
+                self.observe('http_request_duration_seconds', time.perf_counter() - start,
+                             endpoint=endpoint, method=request.method)
+                self.inc('http_requests_total', endpoint=endpoint, method=request.method,
+                         status=response.status_code)
+            return response
+
+    def _snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (list(h.counts), h.count, h.sum, h) for key, h in self._histograms.items()}
+        collected = []
+        for fn in self._collectors:
+            collected.extend(fn())
+        return counters, histograms, collected
+
+    def render_prometheus(self):
+        """Prometheus 文本格式（0.0.4）"""
+        counters, histograms, collected = self._snapshot()
+        lines = []
+        typed = set()
+
+        def header(name, kind):
+            full = self.prefix + name
+            if full not in typed:
+                typed.add(full)
+                if name in self._help:
+                    lines.append(f'# HELP {full} {self._help[name]}')
+                lines.append(f'# TYPE {full} {kind}')
+            return full
+
+        for (name, labels), value in sorted(counters.items()):
+            full = header(name, 'counter')
+            lines.append(f'{full}{_format_labels(labels)} {_format_value(value)}')
+        for name, kind, labels, value in collected:
+            full = header(name, kind)
+            lines.append(f'{full}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+        for (name, labels), (counts, count, total, _) in sorted(histograms.items(), key=lambda item: item[0]):
+            full = header(name, 'histogram')
+            cumulative = 0
+            for bound, n in zip(list(self.buckets) + [float('inf')], counts):
+                cumulative += n
+                bucket_labels = list(labels) + [('le', _format_value(float(bound)))]
+                lines.append(f'{full}_bucket{_format_labels(bucket_labels)} {cumulative}')
+            lines.append(f'{full}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{full}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """供管理后台展示的汇总：各直方图的次数、平均值、p50/p99（毫秒），以及计数器"""
+        counters, histograms, collected = self._snapshot()
+        timings = []
+        for (name, labels), (_, count, total, histogram) in histograms.items():
+            p50, p99 = histogram.quantile(0.5), histogram.quantile(0.99)
+            timings.append({
+                "name": name,
+                "labels": dict(labels),
+                "count": count,
+                "avg_ms": round(total / count * 1000, 2) if count else 0,
+                "p50_ms": None if p50 is None or p50 == float('inf') else p50 * 1000,
+                "p99_ms": None if p99 is None or p99 == float('inf') else p99 * 1000,
+                "total_s": round(total, 3),
+            })
+        timings.sort(key=lambda t: -t['total_s'])
+        values = [{"name": name, "labels": dict(labels), "value": value}
+                  for (name, labels), value in sorted(counters.items())]
+        values += [{"name": name, "labels": labels, "value": value} for name, _, labels, value in collected]
+        return {"timings": timings, "counters": values}
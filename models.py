@@ -0,0 +1,45 @@
+"""
+资源模型 - 紧凑的内存表示，缓存序列化好的 JSON 片段
+"""
+import json
+import sys
+
+
+def encode_json(obj):
+    """紧凑格式的 JSON 字节串（键排序、保留中文），资源片段与拼接的外层结构使用同一格式"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+class Resource(dict):
+    """存储层中的资源
+
+    仍然是 dict 的子类，模板、存储后端、jsonify 都可以照常使用；__slots__ 不再为每个对象
+    分配 __dict__，只多一个槽位缓存自身序列化后的 JSON 片段，列表接口直接拼接这些字节串。
+    字段名、分类 ID 和标签会驻留（sys.intern），上万条资源共享同一批字符串对象。
+
+    资源不可变：修改请通过 ResourceStore 生成新对象，原地修改会让缓存的片段过期。
+    """
+
+    __slots__ = ('_fragment',)
+
+    def __init__(self, fields=()):
+        intern = sys.intern
+        super().__init__((intern(key), value) for key, value in dict(fields).items())
+        self._fragment = None
+        category = self.get('category')
+        if isinstance(category, str):
+            self['category'] = intern(category)
+        tags = self.get('tags')
+        if isinstance(tags, list):
+            self['tags'] = [intern(tag) if isinstance(tag, str) else tag for tag in tags]
+
+    @classmethod
+    def of(cls, resource):
+        """转换为 Resource，已经是 Resource 时原样返回"""
+        return resource if type(resource) is cls else cls(resource)
+
+    def fragment(self):
+        """自身的 JSON 字节串（首次使用时序列化一次）"""
+        if self._fragment is None:
+            self._fragment = encode_json(self)
+        return self._fragment
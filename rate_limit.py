@@ -0,0 +1,94 @@
+"""
+登录限流 - 按 IP 的滑动窗口计数，多个 worker 通过本地 SQLite 文件共享
+"""
+import os
+import sqlite3
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    key TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attempts_key_ts ON attempts (key, ts);
+"""
+
+
+class SlidingWindowLimiter:
+    """滑动窗口限流：window 秒内同一个 key 最多记录 limit 次
+
+    用法是先 check()（超限时直接拒绝，不做任何其他处理），失败后 hit() 记一次，成功后 reset()。
+    path 为 None 时计数只保存在本进程内存中（单进程开发服务器），
+    否则保存在 SQLite 文件里，gunicorn 的多个 worker 看到同一份计数。
+    """
+
+    def __init__(self, limit, window, path=None):
+        self.limit = limit
+        self.window = window
+        self.path = path
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')  # 计数丢了也无妨，不必每次落盘
+        conn.executescript(_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _recent(self, key, now):
+        """窗口内的记录时间（升序）"""
+        since = now - self.window
+        if self.path is None:
+            with self._lock:
+                stamps = [ts for ts in self._memory.get(key, ()) if ts > since]
+                if stamps:
+                    self._memory[key] = stamps
+                else:
+                    self._memory.pop(key, None)
+                return stamps
+        return [ts for (ts,) in self._conn().execute(
+            'SELECT ts FROM attempts WHERE key = ? AND ts > ? ORDER BY ts', (key, since))]
+
+    def check(self, key):
+        """是否允许本次尝试，返回 (是否允许, 需等待的秒数)"""
+        now = time.time()
+        stamps = self._recent(key, now)
+        if len(stamps) < self.limit:
+            return True, 0
+        # 最早的一次移出窗口后才能再试
+        return False, max(int(stamps[-self.limit] + self.window - now) + 1, 1)
+
+    def hit(self, key):
+        """记录一次（失败的）尝试"""
+        now = time.time()
+        if self.path is None:
+            with self._lock:
+                self._memory.setdefault(key, []).append(now)
+            return
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT INTO attempts (key, ts) VALUES (?, ?)', (key, now))
+            # 顺带清理所有过期记录，表始终只有窗口内的数据
+            conn.execute('DELETE FROM attempts WHERE ts <= ?', (now - self.window,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def reset(self, key):
+        """清除 key 的计数（登录成功后调用）"""
+        if self.path is None:
+            with self._lock:
+                self._memory.pop(key, None)
+            return
+        self._conn().execute('DELETE FROM attempts WHERE key = ?', (key,))
@@ -0,0 +1,72 @@
+"""
+响应缓存 - 热门列表查询的序列化结果 LRU 缓存，数据版本变化时整体失效
+"""
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """列表响应的 LRU 缓存
+
+    键是规范化后的查询参数，值是已经序列化好的 JSON 字节串。每次读写都带上当前数据版本，
+    版本与缓存中的不一致（有写入发生）时先清空全部条目，保证不会返回旧数据。
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        """数据版本变化时清空缓存，需持有 _lock"""
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        """取缓存，未命中返回 None"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """命中率等统计（每个 worker 进程各自统计）"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0.0,
+        }
@@ -7,9 +7,14 @@ cd $PROJECT_DIR
 source venv/bin/activate
 
 echo "正在启动服务..."
-gunicorn -w 2 -b 0.0.0.0:$PORT app:app --daemon
+if [ "$SERVER_MODE" = "asgi" ]; then
+    # 异步模式：需要 pip install uvicorn，一个进程处理全部连接
+    gunicorn -k uvicorn.workers.UvicornWorker -w 1 -b 0.0.0.0:$PORT asgi:app --daemon
+else
+    gunicorn -w 2 -b 0.0.0.0:$PORT app:app --daemon
+fi
 
-if pgrep -f "gunicorn.*app:app" > /dev/null; then
+if pgrep -f "gunicorn.*(asgi|app):app" > /dev/null; then
     echo "✅ 服务已启动，端口: $PORT"
 else
     echo "❌ 启动失败"
@@ -1,5 +1,5 @@
 #!/bin/bash
 # 停止服务脚本
 echo "正在停止服务..."
-pkill -f "gunicorn.*app:app"
+pkill -f "gunicorn.*(asgi|app):app"
 echo "✅ 服务已停止"
\ No newline at end of file
@@ -37,16 +37,20 @@ pip install -r requirements.txt -q
 
 # 停止旧服务
 echo -e "\n${GREEN}[3/4] 停止旧服务...${NC}"
-pkill -f "gunicorn.*app:app" 2>/dev/null
+pkill -f "gunicorn.*(asgi|app):app" 2>/dev/null
 sleep 1
 
 # 启动新服务
 echo -e "\n${GREEN}[4/4] 启动新服务...${NC}"
-gunicorn -w 2 -b 0.0.0.0:$PORT app:app --daemon
+if [ "$SERVER_MODE" = "asgi" ]; then
+    gunicorn -k uvicorn.workers.UvicornWorker -w 1 -b 0.0.0.0:$PORT asgi:app --daemon
+else
+    gunicorn -w 2 -b 0.0.0.0:$PORT app:app --daemon
+fi
 sleep 1
 
 # 检查是否启动成功
-if pgrep -f "gunicorn.*app:app" > /dev/null; then
+if pgrep -f "gunicorn.*(asgi|app):app" > /dev/null; then
     echo -e "\n${GREEN}========================================${NC}"
     echo -e "${GREEN}✅ 更新完成！服务已在端口 $PORT 运行${NC}"
     echo -e "${GREEN}========================================${NC}"
@@ -0,0 +1,169 @@
+"""
+搜索倒排索引 - 中文按字/二元组切分，英文数字按单词切分
+"""
+import re
+from bisect import bisect_left, insort
+
+from store import StoreIndex
+
+# 中日韩文字范围（含扩展 A、兼容汉字、假名、韩文）
+_CJK_CHARS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af'
+_CJK_RE = re.compile('[%s]' % _CJK_CHARS)
+_TOKEN_RE = re.compile('[%s]+|[a-z0-9]+' % _CJK_CHARS)
+
+# 各字段命中的权重
+FIELD_WEIGHTS = (('title', 3), ('tags', 2), ('description', 1))
+# 关键词整体出现在标题中的额外加分
+TITLE_PHRASE_BONUS = 5
+
+
+def _is_cjk(token):
+    return bool(_CJK_RE.match(token))
+
+
+def tokenize(text, for_query=False):
+    """切分文本
+
+    中文连续片段切成相邻二元组（"夸克网盘" -> 夸克/克网/网盘），建索引时额外收录单字，
+    以便单字查询；查询时只有单字片段才使用单字。英文和数字按单词切分并转小写。
+    """
+    tokens = []
+    for run in _TOKEN_RE.findall(text.lower()):
+        if not _is_cjk(run):
+            tokens.append(run)
+            continue
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        if not for_query:
+            tokens.extend(run)
+    return tokens
+
+
+def _field_text(resource, field):
+    value = resource.get(field) or ''
+    if field == 'tags':
+        return ' '.join(str(t) for t in value) if isinstance(value, list) else str(value)
+    return str(value)
+
+
+class SearchIndex(StoreIndex):
+    """资源搜索倒排索引
+
+    token -> {资源ID: 权重}。随资源的新增/修改/删除增量维护，不需要整体重建。
+    英文单词支持前缀匹配（"gam" 命中 "game"），多个关键词之间是 AND 关系。
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_tokens = {}
+        self._doc_title = {}
+        self._doc_text = {}
+        # 英文 token 有序表，用于前缀查找
+        self._latin_vocab = []
+
+    def rebuild(self, resources):
+        self.__init__()
+        for resource in resources:
+            self.add(resource)
+
+    def add(self, resource):
+        rid = resource.get('id')
+        if rid is None:
+            return
+        weights = {}
+        for field, weight in FIELD_WEIGHTS:
+            for token in tokenize(_field_text(resource, field)):
+                weights[token] = weights.get(token, 0) + weight
+        for token, weight in weights.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                if not _is_cjk(token):
+                    insort(self._latin_vocab, token)
+            posting[rid] = weight
+        self._doc_tokens[rid] = tuple(weights)
+        title = _field_text(resource, 'title').lower()
+        self._doc_title[rid] = title
+        self._doc_text[rid] = '\n'.join(
+            [title, _field_text(resource, 'description').lower(), _field_text(resource, 'tags').lower()])
+
+    def remove(self, resource):
+        rid = resource.get('id')
+        for token in self._doc_tokens.pop(rid, ()):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(rid, None)
+            if not posting:
+                del self._postings[token]
+                if not _is_cjk(token):
+                    i = bisect_left(self._latin_vocab, token)
+                    if i < len(self._latin_vocab) and self._latin_vocab[i] == token:
+                        del self._latin_vocab[i]
+        self._doc_title.pop(rid, None)
+        self._doc_text.pop(rid, None)
+
+    def update(self, old, new):
+        # 点击数等无关字段变化时无需改动索引
+        if old.get('id') == new.get('id') and all(
+                _field_text(old, field) == _field_text(new, field) for field, _ in FIELD_WEIGHTS):
+            return
+        self.remove(old)
+        self.add(new)
+
+    def _lookup(self, token):
+        """单个查询 token 的倒排列表，英文按前缀合并"""
+        if _is_cjk(token):
+            return self._postings.get(token, {})
+        vocab = self._latin_vocab
+        i = bisect_left(vocab, token)
+        merged = {}
+        while i < len(vocab) and vocab[i].startswith(token):
+            for rid, weight in self._postings[vocab[i]].items():
+                if weight > merged.get(rid, 0):
+                    merged[rid] = weight
+            i += 1
+        return merged
+
+    def _match_keyword(self, keyword):
+        """单个关键词的候选集合及得分"""
+        tokens = tokenize(keyword, for_query=True)
+        if not tokens:
+            # 纯符号关键词无法切分，退化为逐条子串匹配
+            return {rid: 1 for rid, text in self._doc_text.items() if keyword in text}
+        # 从最短的倒排列表开始求交集
+        postings = sorted((self._lookup(t) for t in dict.fromkeys(tokens)), key=len)
+        result = dict(postings[0])
+        for posting in postings[1:]:
+            result = {rid: score + posting[rid] for rid, score in result.items() if rid in posting}
+            if not result:
+                break
+        return result
+
+    def search(self, query):
+        """搜索，返回 {资源ID: 相关度得分}
+
+        多个关键词（空格分隔）同时满足才算命中；二元组求交后会再按原文子串校验，
+        避免"资源测试"命中只分别包含"资源"和"测试"的标题。
+        """
+        keywords = query.lower().split()
+        if not keywords:
+            return {}
+        result = None
+        for keyword in keywords:
+            matched = self._match_keyword(keyword)
+            if result is None:
+                result = matched
+            else:
+                result = {rid: score + matched[rid] for rid, score in result.items() if rid in matched}
+            if not result:
+                return {}
+        scores = {}
+        for rid, score in result.items():
+            text = self._doc_text[rid]
+            if all(keyword in text for keyword in keywords):
+                title = self._doc_title[rid]
+                scores[rid] = score + sum(TITLE_PHRASE_BONUS for keyword in keywords if keyword in title)
+        return scores
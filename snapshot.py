@@ -0,0 +1,137 @@
+"""
+配置快照 - config.json、公告等小文件解析一次后以只读快照常驻内存，写入时通过共享的代数计数通知其他 worker
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from http_cache import file_version
+from store import FileLock, atomic_write_json
+
+# 没有经过 save() 的修改（直接编辑文件）最迟多少秒后生效
+FILE_CHECK_INTERVAL = 2.0
+
+_COUNTER = struct.Struct('<Q')
+
+
+class FrozenDict(dict):
+    """只读字典：可以像普通 dict 一样读取、序列化，修改时抛出 TypeError"""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('配置快照是只读的，请先 dict(...) 复制再修改')
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+
+def freeze(value):
+    """递归转换为只读结构（dict -> FrozenDict，list -> tuple）"""
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class Generation:
+    """多个 worker 共享的代数计数器
+
+    计数保存在一个 8 字节文件中，各进程 mmap 映射同一文件，读取只是一次内存访问，
+    不需要系统调用；写入方在文件锁内加一。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = FileLock(path + '.lock')
+        self._map = None
+        self._init_lock = threading.Lock()
+
+    def _mapping(self):
+        if self._map is None:
+            with self._init_lock:
+                if self._map is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        if os.fstat(fd).st_size < _COUNTER.size:
+                            os.ftruncate(fd, _COUNTER.size)
+                        self._map = mmap.mmap(fd, _COUNTER.size)
+                    finally:
+                        os.close(fd)
+        return self._map
+
+    def value(self):
+        return _COUNTER.unpack_from(self._mapping(), 0)[0]
+
+    def bump(self):
+        """加一并返回新的代数"""
+        mapping = self._mapping()
+        with self.lock:
+            value = _COUNTER.unpack_from(mapping, 0)[0] + 1
+            _COUNTER.pack_into(mapping, 0, value)
+        return value
+
+
+class JsonSnapshot:
+    """JSON 文件的只读快照
+
+    get() 平时只比较共享代数，save() 写文件后把代数加一，所有 worker 下次读取时重新解析；
+    另外每隔 FILE_CHECK_INTERVAL 秒检查一次文件本身，手工编辑文件也会生效。
+    文件不存在时使用 defaults()，prepare(data) 用于补齐旧文件缺少的字段。
+    """
+
+    def __init__(self, path, generation, defaults, prepare=None):
+        self.path = path
+        self.generation = generation
+        self.defaults = defaults
+        self.prepare = prepare
+        self._value = None
+        self._generation = None
+        self._version = (None, None)
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _reload(self, generation):
+        version = file_version(self.path)
+        if version[0] is None:
+            data = self.defaults()
+        else:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        if self.prepare is not None:
+            data = self.prepare(data)
+        self._value = freeze(data)
+        self._version = version
+        self._generation = generation
+
+    def get(self):
+        """当前快照（FrozenDict）"""
+        generation = self.generation.value()
+        now = time.monotonic()
+        if generation == self._generation and now - self._checked < FILE_CHECK_INTERVAL:
+            return self._value
+        with self._lock:
+            if generation != self._generation or file_version(self.path)[0] != self._version[0]:
+                self._reload(generation)
+            self._checked = now
+            return self._value
+
+    def version(self):
+        """((mtime_ns, size), mtime 秒)，与 file_version 相同，但不必每次 stat"""
+        self.get()
+        return self._version
+
+    def save(self, data):
+        """原子写入文件，通知其他 worker，并立即更新本进程的快照"""
+        with self._lock:
+            atomic_write_json(self.path, data)
+            self._reload(self.generation.bump())
+            self._checked = time.monotonic()
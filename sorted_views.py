@@ -0,0 +1,156 @@
+"""
+预排序视图 - 按排序字段和分类维护有序的资源 ID 列表，分页时直接切片
+"""
+import base64
+import json
+from bisect import bisect_left, bisect_right, insort
+
+from store import StoreIndex
+
+# 排序方式 -> (排序字段, 是否倒序)
+SORT_ORDERS = {
+    'newest': ('created_at', True),
+    'oldest': ('created_at', False),
+    'popular': ('clicks', True),
+    'name': ('title', False),
+}
+
+# 排序字段缺失时的默认值
+_FIELD_DEFAULTS = {'created_at': '', 'clicks': 0, 'title': ''}
+
+# 全部分类对应的分区
+ALL = ''
+
+
+def sort_key(resource, field):
+    """排序键：字段值相同时按 ID 排，保证顺序稳定"""
+    return (resource.get(field, _FIELD_DEFAULTS[field]), resource.get('id'))
+
+
+def sort_resources(resources, sort):
+    """按排序方式排序一组资源（用于搜索结果等不在视图里的子集），顺序与视图一致"""
+    field, reverse = SORT_ORDERS[sort]
+    return sorted(resources, key=lambda r: sort_key(r, field), reverse=reverse)
+
+
+def slice_after(keys, after, limit, reverse=False):
+    """键集分页：从升序键列表中取排在 after 之后的 limit 个键（after 为 None 表示第一页）
+
+    倒序时从尾部往前取。因为按键值定位而不是按偏移量，
+    翻页过程中插入新资源或点击数变化都不会让后面的页重复或漏掉数据。
+    """
+    if reverse:
+        end = len(keys) if after is None else bisect_left(keys, after)
+        chunk = keys[max(end - limit, 0):end]
+        chunk.reverse()
+    else:
+        start = 0 if after is None else bisect_right(keys, after)
+        chunk = keys[start:start + limit]
+    return chunk
+
+
+def encode_cursor(sort, key):
+    """把排序方式和最后一条的排序键编码成不透明的游标"""
+    raw = json.dumps([sort, key[0], key[1]], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """解析游标，返回排序键；空游标返回 None，格式错误或与排序方式不符时抛出 ValueError"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, resource_id = json.loads(raw.decode('utf-8'))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('无效的游标')
+    if cursor_sort != sort or not isinstance(resource_id, str):
+        raise ValueError('游标与排序方式不匹配')
+    expected = int if sort in ('popular', 'relevance') else str
+    if not isinstance(value, expected) or isinstance(value, bool):
+        raise ValueError('无效的游标')
+    return (value, resource_id)
+
+
+class SortedViews(StoreIndex):
+    """按 (排序字段, 分类) 维护的有序视图
+
+    每个视图是升序的 [(字段值, ID), ...] 列表，新增/删除/点击数变化时用 bisect 原地维护，
+    倒序的排序方式从列表尾部切片，所以任意分类、任意排序的第 N 页都只是一次切片。
+    """
+
+    def __init__(self):
+        self._views = {field: {} for field in _FIELD_DEFAULTS}
+
+    def rebuild(self, resources):
+        views = {field: {} for field in _FIELD_DEFAULTS}
+        for field, partitions in views.items():
+            everything = partitions[ALL] = []
+            for resource in resources:
+                if resource.get('id') is None:
+                    continue
+                key = sort_key(resource, field)
+                everything.append(key)
+                partitions.setdefault(resource.get('category', ''), []).append(key)
+            for keys in partitions.values():
+                keys.sort()
+        self._views = views
+
+    def _partitions(self, resource):
+        category = resource.get('category', '')
+        return (ALL, category) if category != ALL else (ALL,)
+
+    def add(self, resource):
+        if resource.get('id') is None:
+            return
+        for field, partitions in self._views.items():
+            key = sort_key(resource, field)
+            for name in self._partitions(resource):
+                insort(partitions.setdefault(name, []), key)
+
+    def remove(self, resource):
+        if resource.get('id') is None:
+            return
+        for field, partitions in self._views.items():
+            key = sort_key(resource, field)
+            for name in self._partitions(resource):
+                keys = partitions.get(name)
+                if not keys:
+                    continue
+                i = bisect_left(keys, key)
+                if i < len(keys) and keys[i] == key:
+                    del keys[i]
+                if not keys and name != ALL:
+                    del partitions[name]
+
+    def update(self, old, new):
+        if old.get('category', '') == new.get('category', '') and all(
+                sort_key(old, field) == sort_key(new, field) for field in self._views):
+            return
+        self.remove(old)
+        self.add(new)
+
+    def count(self, category=ALL):
+        """分类下的资源数量"""
+        return len(self._views['title'].get(category, ()))
+
+    def page(self, sort, category=ALL, start=0, end=None):
+        """返回排序后 [start, end) 区间的资源 ID"""
+        field, reverse = SORT_ORDERS[sort]
+        keys = self._views[field].get(category, [])
+        n = len(keys)
+        if end is None:
+            end = n
+        if start < 0 or end <= start:
+            return []
+        if reverse:
+            chunk = keys[max(n - end, 0):max(n - start, 0)]
+            chunk.reverse()
+        else:
+            chunk = keys[start:end]
+        return [key[1] for key in chunk]
+
+    def page_after(self, sort, category=ALL, after=None, limit=20):
+        """键集分页，返回排在 after 之后的 limit 个排序键"""
+        field, reverse = SORT_ORDERS[sort]
+        return slice_after(self._views[field].get(category, []), after, limit, reverse)
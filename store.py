@@ -0,0 +1,378 @@
+"""
+资源数据存储层 - 进程内缓存，按后端指纹校验是否需要重新加载
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from models import Resource
+
+try:
+    import fcntl
+except ImportError:  # Windows 本地测试没有 fcntl，单进程开发服务器不需要跨进程锁
+    fcntl = None
+
+
+def empty_data():
+    """空数据结构"""
+    return {"categories": [], "resources": []}
+
+
+def fsync_dir(directory):
+    """把目录项（rename 结果）也刷到磁盘，Windows 不支持对目录 fsync"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, content):
+    """原子写入文件：先写同目录下的临时文件并 fsync，再 rename 覆盖目标
+
+    写入过程中崩溃或断电时，目标文件要么是旧内容、要么是新内容，不会被截断；
+    并发读取的 worker 也不会读到写了一半的文件。
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    fsync_dir(directory)
+
+
+def atomic_write_json(path, obj, indent=2):
+    """以 JSON 格式原子写入文件"""
+    atomic_write(path, json.dumps(obj, ensure_ascii=False, indent=indent).encode('utf-8'))
+
+
+class FileLock:
+    """基于 flock 的跨进程互斥锁，gunicorn 的多个 worker 共用同一个锁文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        """获取锁；blocking=False 时锁被占用立即返回 False"""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        self._depth += 1
+        if self._depth > 1 or fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._fd)
+            self._fd = None
+            self._depth -= 1
+            self._thread_lock.release()
+            return False
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class StoreIndex:
+    """存储索引基类
+
+    注册到 ResourceStore 后，数据变化时由存储层增量维护：
+    首次加载调用 rebuild()，之后每个新增/删除/变化的资源分别调用 add()/remove()/update()。
+    """
+
+    def rebuild(self, resources):
+        raise NotImplementedError
+
+    def add(self, resource):
+        raise NotImplementedError
+
+    def remove(self, resource):
+        raise NotImplementedError
+
+    def update(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+
+class ResourceStore:
+    """资源数据存储
+
+    每个 worker 进程在内存中保留一份完整数据，具体读写交给存储后端（见 backends.py）。
+    读取时只检查一次后端指纹（JSON 文件为 stat，SQLite 为 generation 计数），
+    只有被另一个 worker 写入后才重新加载；后端支持增量读取时只读取变化的记录。
+
+    load() 返回的是共享的缓存对象：只读路径不要原地修改，需要附加字段时请复制。
+    资源字典视为不可变，修改资源请使用 add_resource(s)/update_resource(s)/delete_resources，
+    这样注册的索引才能按差异增量更新，后端也只需写入变化的记录。
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        # 本进程内的数据代数，每次重新加载或保存都会递增
+        self.generation = 0
+        self._data = None
+        self._stamp = None
+        self._by_id = {}
+        self._indexes = []
+        self._lock = threading.RLock()
+        self.file_lock = FileLock(backend.lock_path)
+        self._compacting = False
+        # 运行计数（供 metrics 导出）：整体加载、增量刷新、写入、日志合并的次数
+        self.counters = {"full_loads": 0, "incremental_loads": 0, "writes": 0, "compactions": 0}
+
+    def load(self):
+        """获取当前数据，后端未变化时直接返回内存中的副本"""
+        stamp = self.backend.stamp()
+        if self._data is not None and stamp == self._stamp:
+            return self._data
+
+        with self._lock:
+            self._refresh()
+            return self._data
+
+    def _refresh(self, force=False):
+        """按后端指纹刷新内存数据，需持有 _lock"""
+        if not force and self._data is not None and self.backend.stamp() == self._stamp:
+            return
+
+        changes = None
+        if not force and self._data is not None:
+            changes = self.backend.changes_since(self._stamp)
+        if changes is not None:
+            stamp, upserts, deleted, categories = changes
+            if not upserts and not deleted and categories is None:
+                self._stamp = stamp
+                return
+            self.counters['incremental_loads'] += 1
+            by_id = dict(self._by_id)
+            for rid in deleted:
+                by_id.pop(rid, None)
+            for resource in upserts:
+                by_id[resource.get('id')] = resource
+            data = {
+                "categories": self._data.get('categories', []) if categories is None else categories,
+                "resources": list(by_id.values()),
+            }
+            self._set_data(data, stamp)
+            return
+
+        try:
+            data, stamp = self.backend.load()
+        except ValueError:
+            # 其他 worker 正在写入，读到了不完整的文件：沿用旧数据，下次请求再试
+            if self._data is not None:
+                return
+            raise
+        self.counters['full_loads'] += 1
+        self._set_data(data, stamp)
+
+    def _set_data(self, data, stamp):
+        # 统一转换为 Resource（未变化的资源沿用原对象，只转换新读入或新修改的）
+        data = dict(data, resources=[Resource.of(r) for r in data.get('resources', [])])
+        old_by_id = self._by_id
+        first_load = self._data is None and not old_by_id
+        self._data = data
+        self._stamp = stamp
+        self._by_id = {r.get('id'): r for r in data.get('resources', [])}
+        self.generation += 1
+        if first_load:
+            for index in self._indexes:
+                index.rebuild(data.get('resources', []))
+        else:
+            self._apply_diff(old_by_id, self._by_id)
+
+    def _apply_diff(self, old_by_id, new_by_id):
+        """比较新旧资源，只把变化的部分通知给索引"""
+        if not self._indexes:
+            return
+        removed = [r for rid, r in old_by_id.items() if rid not in new_by_id]
+        added = []
+        changed = []
+        for rid, resource in new_by_id.items():
+            old = old_by_id.get(rid)
+            if old is None:
+                added.append(resource)
+            elif old is not resource and old != resource:
+                changed.append((old, resource))
+        for index in self._indexes:
+            for resource in removed:
+                index.remove(resource)
+            for old, new in changed:
+                index.update(old, new)
+            for resource in added:
+                index.add(resource)
+
+    def is_current(self):
+        """内存数据是否与后端一致（不加锁、不刷新；为 False 时下一次 load() 需要重新读取）"""
+        return self._data is not None and self.backend.stamp() == self._stamp
+
+    def add_index(self, index):
+        """注册一个 StoreIndex，之后随数据变化增量维护"""
+        with self._lock:
+            self._indexes.append(index)
+            index.rebuild(self.load().get('resources', []))
+        return index
+
+    def version(self):
+        """当前数据版本 (后端指纹, 最后修改时间)，各 worker 之间一致，可用于生成 ETag"""
+        self.load()
+        return self._stamp, self.backend.last_modified()
+
+    def get_resource(self, resource_id):
+        """按 ID 查找资源，不存在时返回 None"""
+        self.load()
+        return self._by_id.get(resource_id)
+
+    def get_resources(self, resource_ids):
+        """按 ID 批量取资源（保持传入顺序，忽略不存在的 ID）"""
+        self.load()
+        by_id = self._by_id
+        return [by_id[rid] for rid in resource_ids if rid in by_id]
+
+    @contextmanager
+    def locked(self):
+        """持有跨进程写锁，并刷新到后端的最新数据
+
+        JSON 文件的 mtime 精度有限，同一时刻两个 worker 写入同样大小的文件时 stat 分辨不出来，
+        所以这类后端在锁内总是重新读取一次。
+        """
+        with self.file_lock:
+            with self._lock:
+                self._refresh(force=not self.backend.exact_stamp)
+                yield self._data
+
+    def _commit(self, data):
+        """写入后端之后更新内存数据，需在 locked() 内调用"""
+        self.counters['writes'] += 1
+        self._set_data(data, self.backend.stamp())
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        """后端的写入日志积累到一定长度后，在后台线程中合并进快照"""
+        if self._compacting or not self.backend.needs_compaction():
+            return
+        self._compacting = True
+        threading.Thread(target=self.compact, name='store-compact', daemon=True).start()
+
+    def compact(self):
+        """把写入日志合并进快照（持有跨进程写锁，期间其他写入等待）"""
+        try:
+            with self.file_lock, self._lock:
+                self._refresh()
+                if self.backend.needs_compaction():
+                    self.backend.compact(self._data)
+                    self._stamp = self.backend.stamp()
+                    self.counters['compactions'] += 1
+        finally:
+            self._compacting = False
+
+    def save(self, data):
+        """整体保存数据（save_data 兼容接口）"""
+        with self.file_lock, self._lock:
+            self.backend.write_all(data)
+            self._commit(data)
+
+    def apply_clicks(self, counts):
+        """把一批点击增量合并进存储（跨进程原子，不会丢失其他 worker 的点击）"""
+        if not counts:
+            return
+        with self.locked() as data:
+            applied = {}
+            resources = []
+            for resource in data.get('resources', []):
+                delta = counts.get(resource.get('id'))
+                if delta:
+                    resource = dict(resource, clicks=resource.get('clicks', 0) + delta)
+                    applied[resource['id']] = delta
+                resources.append(resource)
+            if applied:
+                new_data = dict(data, resources=resources)
+                self.backend.add_clicks(new_data, applied)
+                self._commit(new_data)
+
+    def add_resource(self, resource):
+        """新增资源"""
+        self.add_resources([resource])
+        return resource
+
+    def add_resources(self, resources):
+        """批量新增资源（后端一次写入）"""
+        with self.locked() as data:
+            new_data = dict(data, resources=data.get('resources', []) + list(resources))
+            self.backend.insert_resources(new_data, resources)
+            self._commit(new_data)
+        return resources
+
+    def update_resource(self, resource_id, changes):
+        """更新资源字段，返回更新后的资源；资源不存在时返回 None"""
+        return self.update_resources({resource_id: changes}).get(resource_id)
+
+    def update_resources(self, changes_by_id):
+        """批量更新资源字段 {资源ID: 字段}，后端一次写入；返回 {资源ID: 更新后的资源}，忽略不存在的资源"""
+        updated = {}
+        with self.locked() as data:
+            for rid, changes in changes_by_id.items():
+                old = self._by_id.get(rid)
+                if old is not None:
+                    updated[rid] = dict(old, **changes)
+            if updated:
+                new_data = dict(data, resources=[updated.get(r.get('id'), r) for r in data.get('resources', [])])
+                self.backend.update_resources(new_data, list(updated.values()))
+                self._commit(new_data)
+        return updated
+
+    def save_categories(self, categories):
+        """替换分类列表（在锁内合并到最新数据，不会覆盖其他 worker 的资源修改）"""
+        with self.locked() as data:
+            new_data = dict(data, categories=categories)
+            self.backend.write_categories(new_data)
+            self._commit(new_data)
+
+    def delete_resources(self, resource_ids):
+        """批量删除资源，返回实际删除的数量"""
+        ids = set(resource_ids)
+        with self.locked() as data:
+            deleted = [rid for rid in ids if rid in self._by_id]
+            if deleted:
+                new_data = dict(data, resources=[r for r in data.get('resources', []) if r.get('id') not in ids])
+                self.backend.delete_resources(new_data, deleted)
+                self._commit(new_data)
+        return len(deleted)
+
+    def invalidate(self):
+        """丢弃内存缓存，下次读取时强制重新加载"""
+        with self._lock:
+            self._data = None
+            self._stamp = None
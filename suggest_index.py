@@ -0,0 +1,221 @@
+"""
+输入联想前缀索引 - 标题和标签按前缀查找，按点击量排序，中文标题额外收录拼音首字母
+"""
+import heapq
+
+from store import StoreIndex
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pypinyin 为可选依赖，未安装时不支持拼音首字母联想
+    lazy_pinyin = None
+
+# 前缀树的最大深度，更长的输入在该深度的节点上再按完整前缀过滤
+MAX_DEPTH = 16
+
+# 每个节点缓存的候选数（接口 limit 的上限）
+TOP_CACHED = 20
+
+TITLE = 'title'
+TAG = 'tag'
+
+
+def normalize(text):
+    """转小写并合并空白"""
+    return ' '.join(str(text).lower().split())
+
+
+def _has_cjk(text):
+    return any('\u4e00' <= ch <= '\u9fff' for ch in text)
+
+
+def suggest_keys(text):
+    """一条联想文本的所有查找键：整体、从每个单词开始的后缀、拼音首字母（"原神 攻略" -> "ysgl"）"""
+    base = normalize(text)
+    if not base:
+        return ()
+    words = base.split(' ')
+    keys = {' '.join(words[i:]) for i in range(len(words))}
+    if lazy_pinyin is not None and _has_cjk(base):
+        keys.add(''.join(lazy_pinyin(base, style=Style.FIRST_LETTER)).replace(' ', ''))
+    return tuple(keys)
+
+
+class _Node:
+    __slots__ = ('children', 'ids', 'top')
+
+    def __init__(self):
+        self.children = {}
+        # 经过此节点（键以此为前缀）的联想项
+        self.ids = set()
+        # 按权重排好的前 TOP_CACHED 项，权重或成员变化时置空，下次查询时重算
+        self.top = None
+
+
+class SuggestIndex(StoreIndex):
+    """标题和标签的前缀树
+
+    联想项 ID 为 ("title", 资源ID) 或 ("tag", 标签)，标题的权重是资源点击数，
+    标签的权重是带该标签的资源数加上它们的点击总数。每个节点缓存权重最高的若干项，
+    查询只需沿输入走到对应节点取缓存，不扫描资源列表。
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._keys = {}
+        self._text = {}
+        self._weight = {}
+        self._clicks = {}
+        self._tags = {}
+        self._tag_members = {}
+        self._tag_weights = {}
+
+    def rebuild(self, resources):
+        self.__init__()
+        for resource in resources:
+            self.add(resource)
+
+    def _insert(self, item, keys):
+        for key in keys:
+            node = self._root
+            for ch in key[:MAX_DEPTH]:
+                child = node.children.get(ch)
+                if child is None:
+                    child = node.children[ch] = _Node()
+                node = child
+                node.ids.add(item)
+                node.top = None
+
+    def _delete(self, item, keys):
+        for key in keys:
+            node = self._root
+            for ch in key[:MAX_DEPTH]:
+                child = node.children.get(ch)
+                if child is None:
+                    break
+                child.ids.discard(item)
+                child.top = None
+                if not child.ids:
+                    del node.children[ch]
+                    break
+                node = child
+
+    def _touch(self, item):
+        """权重变化后清掉沿途节点的缓存"""
+        for key in self._keys.get(item, ()):
+            node = self._root
+            for ch in key[:MAX_DEPTH]:
+                node = node.children.get(ch)
+                if node is None:
+                    break
+                node.top = None
+
+    def _add_item(self, item, text, weight):
+        keys = suggest_keys(text)
+        self._keys[item] = keys
+        self._text[item] = text
+        self._weight[item] = weight
+        self._insert(item, keys)
+
+    def _remove_item(self, item):
+        self._delete(item, self._keys.pop(item, ()))
+        self._text.pop(item, None)
+        self._weight.pop(item, None)
+
+    def _retag(self, tag, delta):
+        """标签成员或成员点击数变化后更新标签联想项，delta 为权重的变化量"""
+        item = (TAG, tag)
+        weight = self._tag_weights.get(tag, 0) + delta
+        if not self._tag_members.get(tag):
+            self._tag_members.pop(tag, None)
+            self._tag_weights.pop(tag, None)
+            self._remove_item(item)
+            return
+        self._tag_weights[tag] = weight
+        if item in self._weight:
+            self._weight[item] = weight
+            self._touch(item)
+        else:
+            self._add_item(item, tag, weight)
+
+    def add(self, resource):
+        rid = resource.get('id')
+        if rid is None:
+            return
+        self._clicks[rid] = resource.get('clicks', 0) or 0
+        title = str(resource.get('title') or '').strip()
+        if title:
+            self._add_item((TITLE, rid), title, self._clicks[rid])
+        tags = resource.get('tags') or []
+        tags = tuple(dict.fromkeys(str(t).strip() for t in tags if str(t).strip())) if isinstance(tags, list) else ()
+        self._tags[rid] = tags
+        for tag in tags:
+            self._tag_members.setdefault(tag, set()).add(rid)
+            self._retag(tag, 1 + self._clicks[rid])
+
+    def remove(self, resource):
+        rid = resource.get('id')
+        self._remove_item((TITLE, rid))
+        clicks = self._clicks.pop(rid, 0)
+        for tag in self._tags.pop(rid, ()):
+            self._tag_members.get(tag, set()).discard(rid)
+            self._retag(tag, -1 - clicks)
+
+    def update(self, old, new):
+        if old.get('title') != new.get('title') or old.get('tags') != new.get('tags') \
+                or old.get('id') != new.get('id'):
+            self.remove(old)
+            self.add(new)
+            return
+        clicks = new.get('clicks', 0) or 0
+        rid = new.get('id')
+        if rid not in self._clicks:
+            self.add(new)
+            return
+        delta = clicks - self._clicks[rid]
+        if not delta:
+            return
+        # 只有点击数变化：调整权重，不改动树结构
+        self._clicks[rid] = clicks
+        item = (TITLE, rid)
+        if item in self._weight:
+            self._weight[item] = clicks
+            self._touch(item)
+        for tag in self._tags.get(rid, ()):
+            self._retag(tag, delta)
+
+    def suggest(self, prefix, limit=8, exclude=None):
+        """以 prefix 开头的联想项，按权重从高到低，返回 [(类型, 文本, 资源ID或None), ...]
+
+        exclude 为要跳过的资源 ID 集合（如失效链接），只影响标题项。
+        """
+        key = normalize(prefix)
+        if not key:
+            return []
+        node = self._root
+        for ch in key[:MAX_DEPTH]:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        weight = self._weight.__getitem__
+        if len(key) > MAX_DEPTH:
+            items = [item for item in tuple(node.ids) if any(k.startswith(key) for k in self._keys[item])]
+            ranked = heapq.nlargest(TOP_CACHED, items, key=weight)
+        else:
+            if node.top is None:
+                # 复制一份再排序，其他线程写入时集合可能正在变化
+                node.top = heapq.nlargest(TOP_CACHED, tuple(node.ids), key=weight)
+            ranked = node.top
+        results = []
+        seen = set()
+        for kind, value in ranked:
+            if kind == TITLE and exclude and value in exclude:
+                continue
+            text = self._text[(kind, value)]
+            if (kind, text) in seen:
+                continue  # 同名资源只出现一次
+            seen.add((kind, text))
+            results.append((kind, text, value if kind == TITLE else None))
+            if len(results) >= limit:
+                break
+        return results
@@ -0,0 +1,144 @@
+"""
+失效链接检测 - 用本地桩 HTTP 服务验证状态判定、按主机限速和结果写回
+"""
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import JsonBackend  # noqa: E402
+from link_checker import DEAD, ERROR, OK, HostThrottle, LinkChecker  # noqa: E402
+from store import ResourceStore  # noqa: E402
+
+# 路径 -> (状态码, 页面内容)
+PAGES = {
+    '/s/ok': (200, '<title>夸克网盘分享</title>'),
+    '/s/expired': (200, '<div class="tips">分享地址已失效</div>'),
+    '/s/gone': (404, 'not found'),
+    '/s/broken': (500, 'server error'),
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hits.append((self.path, time.monotonic()))
+        status, body = PAGES.get(self.path, (404, 'not found'))
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def closed_port():
+    """一个当前没有服务监听的本地端口（连接会被拒绝）"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class LinkCheckerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.server.hits = []
+        cls.base = f'http://127.0.0.1:{cls.server.server_address[1]}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.hits.clear()
+        self.tmp = tempfile.mkdtemp()
+        # 本地地址不能走环境变量里的代理
+        patcher = mock.patch.dict(os.environ, {'no_proxy': '127.0.0.1,localhost', 'NO_PROXY': '127.0.0.1,localhost'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def make_checker(self, store=None, **kwargs):
+        kwargs.setdefault('per_host_interval', 0)
+        kwargs.setdefault('timeout', 5)
+        return LinkChecker(store, os.path.join(self.tmp, 'link_check.lock'), **kwargs)
+
+    def test_check_link_status(self):
+        checker = self.make_checker()
+        self.assertEqual(checker.check_link(self.base + '/s/ok'), (OK, 'HTTP 200'))
+        self.assertEqual(checker.check_link(self.base + '/s/expired'), (DEAD, '分享地址已失效'))
+        self.assertEqual(checker.check_link(self.base + '/s/gone'), (DEAD, 'HTTP 404'))
+        self.assertEqual(checker.check_link(self.base + '/s/broken'), (ERROR, 'HTTP 500'))
+        self.assertEqual(checker.check_link('链接：' + self.base + '/s/ok 提取码：abcd')[0], OK)
+        self.assertEqual(checker.check_link(f'http://127.0.0.1:{closed_port()}/s/ok')[0], ERROR)
+        self.assertEqual(checker.check_link(''), (ERROR, '无法识别的链接'))
+
+    def test_host_throttle(self):
+        throttle = HostThrottle(0.2)
+        start = time.monotonic()
+        throttle.wait('a.example')
+        throttle.wait('b.example')
+        self.assertLess(time.monotonic() - start, 0.1)
+        throttle.wait('a.example')
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_same_host_requests_are_spaced(self):
+        checker = self.make_checker(per_host_interval=0.2, concurrency=4)
+        threads = [threading.Thread(target=checker.check_link, args=(self.base + path,))
+                   for path in ('/s/ok', '/s/gone', '/s/expired')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        times = sorted(t for _, t in self.server.hits)
+        self.assertEqual(len(times), 3)
+        for earlier, later in zip(times, times[1:]):
+            self.assertGreaterEqual(later - earlier, 0.18)
+
+    def test_check_all_writes_results(self):
+        path = os.path.join(self.tmp, 'resources.json')
+        resources = [
+            {"id": "r1", "title": "ok", "link": self.base + '/s/ok'},
+            {"id": "r2", "title": "same share", "link": self.base + '/s/ok/'},
+            {"id": "r3", "title": "expired", "link": self.base + '/s/expired'},
+            {"id": "r4", "title": "gone", "link": self.base + '/s/gone'},
+            {"id": "r5", "title": "refused", "link": f'http://127.0.0.1:{closed_port()}/s/x'},
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"categories": [], "resources": resources}, f)
+        store = ResourceStore(JsonBackend(path))
+        checker = self.make_checker(store)
+
+        report = checker.check_all()
+        self.assertEqual((report['total'], report[OK], report[DEAD], report[ERROR]), (4, 1, 2, 1))
+        # 指向同一分享的链接只请求一次
+        self.assertEqual(sorted(p for p, _ in self.server.hits), ['/s/expired', '/s/gone', '/s/ok'])
+        status = {rid: store.get_resource(rid).get('link_status') for rid in ('r1', 'r2', 'r3', 'r4', 'r5')}
+        self.assertEqual(status, {'r1': OK, 'r2': OK, 'r3': DEAD, 'r4': DEAD, 'r5': ERROR})
+
+        # 结果在有效期内不再重新检查，force 时全部重查
+        self.server.hits.clear()
+        self.assertEqual(checker.check_all()['total'], 0)
+        self.assertEqual(checker.check_all(force=True, resource_ids=['r3'])['total'], 1)
+        self.assertEqual([p for p, _ in self.server.hits], ['/s/expired'])
+
+
+if __name__ == '__main__':
+    unittest.main()